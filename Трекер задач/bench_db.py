@@ -0,0 +1,129 @@
+"""Замер пропускной способности DBManager при смешанной нагрузке.
+
+    python bench_db.py [--seconds 5] [--readers 8] [--writers 4] [--users 2000]
+
+Читатели выполняют запросы статистики привычки (как колбэки бота) и изредка
+тяжёлый агрегат по всем отметкам, писатели — короткие UPDATE с commit=True
+(как цикл напоминаний). Сравниваются прежняя схема — одна общая блокировка
+на все запросы и commit на каждую запись — и текущий DBManager: пул
+соединений для чтения и запись с групповым коммитом.
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+from contextlib import redirect_stdout
+
+from db import ConnectionPool, DBManager
+
+
+class GlobalLockDB:
+    """Прежний DBManager.execute: каждый запрос под одной threading.Lock, commit на каждую запись"""
+
+    def __init__(self, db_path, pool_size=8):
+        self.lock = threading.Lock()
+        self.pool = ConnectionPool(db_path, max_size=pool_size)
+
+    def execute(self, sql, params=(), commit=False, fetchone=False, fetchall=False):
+        with self.lock, self.pool.connection() as conn:
+            c = conn.execute(sql, params)
+            if commit:
+                conn.commit()
+            if fetchone:
+                return c.fetchone()
+            if fetchall:
+                return c.fetchall()
+
+
+def populate(db, users):
+    today = time.strftime('%Y-%m-%d')
+    with db.transaction() as conn:
+        conn.executemany("INSERT INTO users (user_id, username, joined_at) VALUES (?, ?, ?)",
+                         [(user_id, f"user{user_id}", today) for user_id in range(users)])
+        conn.executemany("INSERT INTO reminders (user_id, text, time, repeat, is_habit) VALUES (?, ?, '09:00', 'ежедневно', 1)",
+                         [(user_id, f"Привычка {i}") for user_id in range(users) for i in range(3)])
+        conn.executemany("INSERT INTO habit_completions (user_id, reminder_id, completion_date) VALUES (?, ?, ?)",
+                         [(reminder_id // 3, reminder_id, f"2026-01-{day:02d}")
+                          for reminder_id in range(1, users * 3 + 1) for day in range(1, 8)])
+
+
+def percentile(latencies, q):
+    return latencies[int(len(latencies) * q)] * 1000 if latencies else 0.0
+
+
+def run_load(db, seconds, readers, writers, users):
+    stop = threading.Event()
+    read_latencies = [[] for _ in range(readers)]
+    write_latencies = [[] for _ in range(writers)]
+
+    def reader(i):
+        rnd = random.Random(i)
+        while not stop.is_set():
+            reminder_id = rnd.randint(1, users * 3)
+            started = time.perf_counter()
+            db.execute('''SELECT completion_date FROM habit_completions
+                          WHERE reminder_id = ? AND completion_date BETWEEN ? AND ? ORDER BY completion_date''',
+                       (reminder_id, '2026-01-01', '2026-01-07'), fetchall=True)
+            db.execute("SELECT text, habit_streak FROM reminders WHERE id = ?", (reminder_id,), fetchone=True)
+            read_latencies[i].append(time.perf_counter() - started)
+            if len(read_latencies[i]) % 20 == 0:
+                # Раз в 20 обращений — тяжёлый агрегат, как в статистике администратора
+                db.execute("SELECT COUNT(DISTINCT user_id), COUNT(*) FROM habit_completions WHERE completion_date >= ?",
+                           ('2026-01-03',), fetchone=True)
+
+    def writer(i):
+        rnd = random.Random(1000 + i)
+        while not stop.is_set():
+            started = time.perf_counter()
+            db.execute("UPDATE reminders SET last_sent = ?, retry_count = retry_count + 1 WHERE id = ?",
+                       (time.strftime('%Y-%m-%dT%H:%M:%S'), rnd.randint(1, users * 3)), commit=True)
+            write_latencies[i].append(time.perf_counter() - started)
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    threads += [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    reads = sorted(latency for per_reader in read_latencies for latency in per_reader)
+    writes = sorted(latency for per_writer in write_latencies for latency in per_writer)
+    return {
+        'reads': len(reads) / seconds,
+        'writes': len(writes) / seconds,
+        'read_p50_ms': percentile(reads, 0.5),
+        'read_p95_ms': percentile(reads, 0.95),
+        'write_p50_ms': percentile(writes, 0.5),
+        'write_p95_ms': percentile(writes, 0.95),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--users', type=int, default=2000)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    db_path = os.path.join(workdir, 'bench.db')
+    with redirect_stdout(open(os.devnull, 'w')):
+        manager = DBManager(db_path, pool_size=args.readers + 1)
+    populate(manager, args.users)
+
+    print(f"Читателей: {args.readers}, писателей: {args.writers}, {args.seconds:.0f} с на замер")
+    for name, db in (("общая блокировка", GlobalLockDB(db_path, pool_size=args.readers + args.writers)),
+                     ("пул чтения + очередь записи", manager)):
+        result = run_load(db, args.seconds, args.readers, args.writers, args.users)
+        print(f"{name}: чтений {result['reads']:.0f}/с (p50 {result['read_p50_ms']:.2f} мс, p95 {result['read_p95_ms']:.2f} мс), "
+              f"записей {result['writes']:.0f}/с (p50 {result['write_p50_ms']:.2f} мс, p95 {result['write_p95_ms']:.2f} мс)")
+    print(f"групповой коммит: {manager.writer.statements} записей за {manager.writer.batches} коммитов")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""Замер времени запуска бота и веб-API.
+
+    python bench_startup.py [--runs 5]
+
+bot.py — время от старта интерпретатора до запуска polling (сам polling
+подменяется, сеть и токен не нужны). webapp_api.py — время до первого
+ответа на /health. Каждый замер идёт в новом процессе во временном каталоге.
+"""
+import argparse
+import multiprocessing
+import os
+import runpy
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def report(started):
+    print(f"BENCH {time.time() - started:.4f} {int('matplotlib' in sys.modules)}", flush=True)
+    # Процессы рендеринга графиков держат stdout открытым, их нужно завершить
+    for process in multiprocessing.active_children():
+        process.kill()
+    os._exit(0)
+
+
+def child_bot(started):
+    import telebot
+
+    def first_poll(*args, **kwargs):
+        report(started)
+
+    telebot.TeleBot.polling = first_poll
+    runpy.run_path(os.path.join(HERE, 'bot.py'), run_name='__main__')
+
+
+def child_webapp(started):
+    sys.path.insert(0, HERE)
+    import webapp_api
+
+    webapp_api.app.test_client().get('/health')
+    report(started)
+
+
+def measure(target, runs):
+    results = []
+    for _ in range(runs):
+        with tempfile.TemporaryDirectory() as workdir:
+            started = time.time()
+            stdout = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--child', target, '--started', repr(started)],
+                cwd=workdir, capture_output=True, text=True, check=True,
+                env=dict(os.environ, PYTHONPATH=HERE),
+            ).stdout
+        _, elapsed, matplotlib_loaded = next(line for line in stdout.splitlines() if line.startswith('BENCH ')).split()
+        results.append((float(elapsed), matplotlib_loaded == '1'))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--child')
+    parser.add_argument('--started', type=float)
+    args = parser.parse_args()
+
+    if args.child == 'bot':
+        return child_bot(args.started)
+    if args.child == 'webapp':
+        return child_webapp(args.started)
+
+    for target, label in (('bot', 'bot.py → запуск polling'), ('webapp', 'webapp_api.py → первый ответ /health')):
+        results = measure(target, args.runs)
+        times = [elapsed for elapsed, _ in results]
+        print(f"{label}: медиана {statistics.median(times) * 1000:.0f} мс, "
+              f"мин {min(times) * 1000:.0f} мс, макс {max(times) * 1000:.0f} мс, "
+              f"matplotlib загружен: {'да' if any(loaded for _, loaded in results) else 'нет'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""Замер отдачи файлов Mini App: send_from_directory против StaticAssets.
+
+    python bench_static.py [--requests 2000] [--mbit 1.6] [--rtt-ms 150]
+
+Для обоих вариантов считается, сколько байт уходит клиенту при первом
+открытии (index.html и всё, на что он ссылается) и при повторном (браузер
+с кэшем), сколько стоит один запрос index.html на сервере, и оценивается
+время загрузки на мобильной сети со скоростью --mbit и задержкой --rtt-ms:
+по RTT на каждую волну запросов плюс время передачи байт.
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+from flask import Flask, request, send_from_directory
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+WEBAPP_DIR = os.path.join(HERE, 'webapp')
+BROWSER_HEADERS = {'Accept-Encoding': 'gzip, deflate, br'}
+
+
+def old_app():
+    """Прежние маршруты: файл читается с диска на каждый запрос, без сжатия и Cache-Control"""
+    app = Flask(__name__)
+
+    @app.route('/webapp')
+    def serve_webapp():
+        return send_from_directory(WEBAPP_DIR, 'index.html')
+
+    @app.route('/webapp/<path:path>')
+    def serve_static(path):
+        return send_from_directory(WEBAPP_DIR, path)
+
+    return app
+
+
+def new_app():
+    from static_assets import StaticAssets
+
+    app = Flask(__name__)
+    assets = StaticAssets(WEBAPP_DIR)
+
+    @app.route('/webapp')
+    def serve_webapp():
+        return assets.response(app, request, 'index.html')
+
+    @app.route('/webapp/<path:path>')
+    def serve_static(path):
+        return assets.response(app, request, path)
+
+    return app
+
+
+def open_page(client, cache):
+    """Открытие страницы браузером с кэшем cache: {путь: (ETag, Cache-Control)}; возвращает (байт, запросов)"""
+    total, requests_made = 0, 0
+    paths = ['/webapp']
+    while paths:
+        path = paths.pop(0)
+        etag, cache_control = cache.get(path, (None, ''))
+        if 'immutable' in cache_control:
+            continue
+        headers = dict(BROWSER_HEADERS)
+        if etag:
+            headers['If-None-Match'] = etag
+        response = client.get(path, headers=headers)
+        requests_made += 1
+        total += len(response.data)
+        cache[path] = (response.headers.get('ETag'), response.headers.get('Cache-Control', ''))
+        if path == '/webapp':
+            body = client.get(path, headers={'Accept-Encoding': 'identity'}).get_data(as_text=True)
+            paths += re.findall(r'(?:src|href)="(/webapp/[^"]+)"', body)
+    return total, requests_made
+
+
+def mobile_seconds(total, waves, mbit, rtt_ms):
+    return waves * rtt_ms / 1000 + total * 8 / (mbit * 1_000_000)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--mbit', type=float, default=1.6)
+    parser.add_argument('--rtt-ms', type=float, default=150)
+    args = parser.parse_args()
+    sys.path.insert(0, HERE)
+
+    for name, app in (("send_from_directory", old_app()), ("StaticAssets", new_app())):
+        client = app.test_client()
+        cache = {}
+        cold_bytes, cold_requests = open_page(client, cache)
+        warm_bytes, warm_requests = open_page(client, cache)
+        # Страница и файлы, на которые она ссылается, — две волны запросов
+        cold_waves = 2 if cold_requests > 1 else 1
+        warm_waves = 2 if warm_requests > 1 else 1
+
+        started = time.perf_counter()
+        for _ in range(args.requests):
+            client.get('/webapp', headers=BROWSER_HEADERS)
+        per_request_us = (time.perf_counter() - started) / args.requests * 1e6
+
+        print(f"{name}: первое открытие {cold_bytes} байт за {cold_requests} запр. "
+              f"(~{mobile_seconds(cold_bytes, cold_waves, args.mbit, args.rtt_ms) * 1000:.0f} мс), "
+              f"повторное {warm_bytes} байт за {warm_requests} запр. "
+              f"(~{mobile_seconds(warm_bytes, warm_waves, args.mbit, args.rtt_ms) * 1000:.0f} мс), "
+              f"index.html на сервере {per_request_us:.0f} мкс")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""Замер обработки наступивших напоминаний за один тик планировщика.
+
+    python bench_tick.py [--rows 10000] [--batch-sizes 1,50,500,2000]
+
+Создаёт во временном каталоге базу с --rows наступившими ежедневными
+напоминаниями и для каждого размера пачки прогоняет get_due_reminders +
+enqueue_due_reminders, как check_reminders. Размер пачки 1 — прежнее
+поведение: транзакция на каждое напоминание.
+"""
+import argparse
+import datetime
+import os
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--batch-sizes', default='1,50,500,2000')
+    args = parser.parse_args()
+
+    os.chdir(tempfile.mkdtemp())
+    sys.path.insert(0, HERE)
+    with redirect_stdout(open(os.devnull, 'w')):
+        import bot
+        bot.LEASES.heartbeat()
+
+    from recurrence import compile_rule, rule_columns
+
+    today = datetime.date.today()
+    rule = rule_columns(compile_rule('ежедневно', today))
+    with bot.DB_MANAGER.transaction() as conn:
+        conn.executemany("INSERT INTO users (user_id, username, joined_at) VALUES (?, ?, ?)",
+                         [(user_id, f"user{user_id}", today.isoformat()) for user_id in range(args.rows)])
+        conn.executemany("""INSERT INTO reminders (user_id, text, time, repeat, is_habit, rrule_freq, rrule_interval, rrule_weekdays, rrule_anchor)
+                            VALUES (?, 'Пить воду', '09:00', 'ежедневно', 1, ?, ?, ?, ?)""",
+                         [(user_id, *rule) for user_id in range(args.rows)])
+    reminder_ids = [row[0] for row in bot.DB_MANAGER.execute("SELECT id FROM reminders", fetchall=True)]
+
+    print(f"Наступивших напоминаний: {args.rows}")
+    for run, batch_size in enumerate(int(size) for size in args.batch_sizes.split(',')):
+        # У каждого прогона своё время срабатывания, чтобы очередь не отбросила строки как повторы
+        due_at = int(time.time()) - 60 - run
+        bot.DB_MANAGER.execute("UPDATE reminders SET next_send_at = ?, retry_count = 0", (due_at,), commit=True)
+        bot.DB_MANAGER.execute("DELETE FROM reminder_outbox", commit=True)
+
+        started = time.perf_counter()
+        now = time.time()
+        claimed = bot.enqueue_due_reminders(bot.get_due_reminders(reminder_ids, now), now, batch_size=batch_size)
+        elapsed = time.perf_counter() - started
+        queued = bot.OUTBOX.stats()['pending']
+        print(f"пачка {batch_size:>5}: {elapsed:.2f} с, {claimed / elapsed:,.0f} строк/с, "
+              f"транзакций {-(-claimed // batch_size)}, в очереди {queued}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+"""Замер веб-API: сервер разработки Flask против gunicorn.
+
+    python bench_webapp.py [--seconds 10] [--clients 2] [--threads 16] [--workers 4]
+
+Во временном каталоге создаётся база с --users пользователями по 10
+напоминаний, затем по очереди поднимаются сервер разработки (как прежний
+python webapp_api.py: debug=True с перезагрузкой) и gunicorn -c gunicorn.conf.py
+с --workers воркерами. Нагрузка — --clients процессов по --threads потоков
+с постоянными соединениями, смесь GET /api/reminders, /api/stats и
+/api/user/info для случайных пользователей. Печатаются запросы в секунду и
+задержки p50/p99. Клиент и сервер делят процессор, поэтому на машине с
+малым числом ядер итоговые числа занижены для обоих вариантов.
+"""
+import argparse
+import http.client
+import multiprocessing
+import os
+import random
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import redirect_stdout
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PORT = 5097
+
+
+def populate(db_path, users):
+    sys.path.insert(0, HERE)
+    from db import DBManager
+
+    with redirect_stdout(open(os.devnull, 'w')):
+        db = DBManager(db_path)
+    today = time.strftime('%Y-%m-%d')
+    with db.transaction() as conn:
+        conn.executemany("INSERT INTO users (user_id, username, joined_at) VALUES (?, ?, ?)",
+                         [(user_id, f"user{user_id}", today) for user_id in range(users)])
+        conn.executemany("INSERT INTO reminders (user_id, text, time, repeat, is_habit, habit_streak) VALUES (?, ?, ?, 'ежедневно', ?, ?)",
+                         [(user_id, f"Напоминание {i}", f"{8 + i:02d}:00", i % 2, i) for user_id in range(users) for i in range(10)])
+        conn.executemany("INSERT INTO habit_completions (user_id, reminder_id, completion_date) VALUES (?, ?, ?)",
+                         [((reminder_id - 1) // 10, reminder_id, today) for reminder_id in range(1, users * 10 + 1, 2)])
+
+
+def start_server(mode, env, workers):
+    if mode == 'dev':
+        command = [sys.executable, '-c',
+                   f"import webapp_api; webapp_api.app.run(host='127.0.0.1', port={PORT}, debug=True)"]
+    else:
+        command = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py',
+                   '--bind', f'127.0.0.1:{PORT}', '--workers', str(workers)]
+    process = subprocess.Popen(command, cwd=HERE, env=env, start_new_session=True,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    for _ in range(100):
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', PORT, timeout=1)
+            conn.request('GET', '/health')
+            if conn.getresponse().status == 200:
+                return process
+        except OSError:
+            time.sleep(0.2)
+    stop_server(process)
+    raise RuntimeError(f"Сервер {mode} не запустился")
+
+
+def stop_server(process):
+    # Перезагрузчик сервера разработки запускает дочерний процесс — гасим всю группу
+    os.killpg(process.pid, signal.SIGTERM)
+    process.wait()
+
+
+def client(seconds, threads, users, seed):
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def worker(i):
+        rnd = random.Random(seed * 1000 + i)
+        conn = None
+        local = []
+        while time.perf_counter() < deadline:
+            path = rnd.choice(('/api/reminders', '/api/stats', '/api/user/info'))
+            started = time.perf_counter()
+            try:
+                if conn is None:
+                    conn = http.client.HTTPConnection('127.0.0.1', PORT, timeout=10)
+                conn.request('GET', f"{path}?user_id={rnd.randrange(users)}")
+                response = conn.getresponse()
+                response.read()
+                if response.status != 200:
+                    raise OSError(response.status)
+                if response.getheader('Connection', '').lower() == 'close':
+                    conn.close()
+                    conn = None
+                local.append(time.perf_counter() - started)
+            except (OSError, http.client.HTTPException):
+                with lock:
+                    errors[0] += 1
+                conn = None
+        with lock:
+            latencies.extend(local)
+
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return latencies, errors[0]
+
+
+def measure(args):
+    with multiprocessing.Pool(args.clients) as pool:
+        results = pool.starmap(client, [(args.seconds, args.threads, args.users, seed) for seed in range(args.clients)])
+    latencies = sorted(latency for part, _ in results for latency in part)
+    errors = sum(errors for _, errors in results)
+    return {
+        'rps': len(latencies) / args.seconds,
+        'p50_ms': latencies[len(latencies) // 2] * 1000 if latencies else 0.0,
+        'p99_ms': latencies[int(len(latencies) * 0.99)] * 1000 if latencies else 0.0,
+        'errors': errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--clients', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--users', type=int, default=1000)
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    populate(db_path, args.users)
+    env = dict(os.environ, DATABASE_URL=db_path, PYTHONPATH=HERE)
+
+    print(f"Клиентов: {args.clients} × {args.threads} потоков, {args.seconds:.0f} с на замер, ядер: {os.cpu_count()}")
+    for mode, name in (('dev', "сервер разработки"), ('gunicorn', f"gunicorn, воркеров: {args.workers}")):
+        process = start_server(mode, env, args.workers)
+        try:
+            result = measure(args)
+        finally:
+            stop_server(process)
+        print(f"{name}: {result['rps']:.0f} запросов/с, p50 {result['p50_ms']:.1f} мс, "
+              f"p99 {result['p99_ms']:.1f} мс, ошибок {result['errors']}")
+
+
+if __name__ == '__main__':
+    main()
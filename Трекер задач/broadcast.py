@@ -0,0 +1,111 @@
+import datetime
+import threading
+import time
+
+
+class BroadcastManager:
+    """Рассылки с сохранением состояния в базе.
+
+    Для каждой рассылки хранится статус каждого получателя, поэтому после
+    перезапуска бота рассылка продолжается с неотправленных.
+    """
+
+    def __init__(self, db, send_message, delivery, notify, batch_size=200, progress_seconds=30):
+        self.db = db
+        self.send_message = send_message
+        self.delivery = delivery
+        self.notify = notify
+        self.batch_size = batch_size
+        self.progress_seconds = progress_seconds
+
+    def create(self, admin_id, text):
+        now = datetime.datetime.now().isoformat()
+        with self.db.transaction() as conn:
+            broadcast_id = conn.execute(
+                "INSERT INTO broadcasts (admin_id, text, status, created_at) VALUES (?, ?, 'running', ?)",
+                (admin_id, text, now)).lastrowid
+            total = conn.execute(
+                "INSERT INTO broadcast_recipients (broadcast_id, user_id, status) SELECT ?, user_id, 'pending' FROM users",
+                (broadcast_id,)).rowcount
+        return broadcast_id, total
+
+    def start(self, broadcast_id):
+        thread = threading.Thread(target=self._run, args=(broadcast_id,), daemon=True,
+                                  name=f'broadcast-{broadcast_id}')
+        thread.start()
+        return thread
+
+    def resume(self):
+        rows = self.db.execute("SELECT id FROM broadcasts WHERE status = 'running'", fetchall=True) or []
+        for (broadcast_id,) in rows:
+            print(f"📢 Продолжаем рассылку #{broadcast_id}")
+            self.start(broadcast_id)
+
+    def progress(self, broadcast_id):
+        rows = self.db.execute(
+            "SELECT status, COUNT(*) FROM broadcast_recipients WHERE broadcast_id = ? GROUP BY status",
+            (broadcast_id,), fetchall=True) or []
+        counts = {'pending': 0, 'sent': 0, 'failed': 0}
+        counts.update(dict(rows))
+        counts['total'] = sum(counts.values())
+        return counts
+
+    def _deliver(self, user_id, text, results):
+        try:
+            self.send_message(user_id, text)
+            results.append(('sent', None, user_id))
+            return True
+        except Exception as e:
+            results.append(('failed', str(e)[:200], user_id))
+            return False
+
+    def _notify(self, admin_id, text):
+        try:
+            self.notify(admin_id, text)
+        except Exception as e:
+            print(f"Не удалось отправить отчёт о рассылке администратору {admin_id}: {e}")
+
+    def _run(self, broadcast_id):
+        row = self.db.execute("SELECT admin_id, text FROM broadcasts WHERE id = ?", (broadcast_id,), fetchone=True)
+        if not row:
+            return
+        admin_id, text = row
+        last_report = time.monotonic()
+
+        while True:
+            pending = self.db.execute(
+                "SELECT user_id FROM broadcast_recipients WHERE broadcast_id = ? AND status = 'pending' LIMIT ?",
+                (broadcast_id, self.batch_size), fetchall=True)
+            if pending is None:
+                time.sleep(5)
+                continue
+            if not pending:
+                break
+
+            results = []
+            jobs = [(user_id, lambda user_id=user_id: self._deliver(user_id, text, results))
+                    for (user_id,) in pending]
+            stats = self.delivery.run_batch(jobs)
+            print(f"📢 Рассылка #{broadcast_id}: доставлено {stats['total'] - stats['failed']}/{stats['total']} "
+                  f"за {stats['duration']} с (p50 {stats['p50']} с, p95 {stats['p95']} с, max {stats['max']} с)")
+
+            now = datetime.datetime.now().isoformat()
+            with self.db.transaction() as conn:
+                conn.executemany(
+                    "UPDATE broadcast_recipients SET status = ?, error = ?, sent_at = ? WHERE broadcast_id = ? AND user_id = ?",
+                    [(status, error, now, broadcast_id, user_id) for status, error, user_id in results])
+
+            if time.monotonic() - last_report >= self.progress_seconds:
+                last_report = time.monotonic()
+                counts = self.progress(broadcast_id)
+                self._notify(admin_id,
+                             f"📤 Рассылка #{broadcast_id}: отправлено {counts['sent'] + counts['failed']} из {counts['total']}")
+
+        self.db.execute("UPDATE broadcasts SET status = 'done', finished_at = ? WHERE id = ?",
+                        (datetime.datetime.now().isoformat(), broadcast_id), commit=True)
+        counts = self.progress(broadcast_id)
+        self._notify(admin_id,
+                     f"✅ РАССЫЛКА #{broadcast_id} ЗАВЕРШЕНА:\n\n"
+                     f"✅ Успешно: {counts['sent']}\n"
+                     f"❌ Не удалось: {counts['failed']}\n"
+                     f"📊 Всего: {counts['total']}")
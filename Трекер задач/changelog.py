@@ -0,0 +1,114 @@
+import time
+from datetime import timedelta
+
+# Журнал change_log заполняют триггеры базы (миграция 11). Идентификаторы
+# выдаются при вставке, а видны после коммита, поэтому параллельная транзакция
+# может закоммитить меньший id позже большего. Курсор клиента двигается только
+# до записей старше SETTLE_SECONDS: всё, что новее, он получит ещё раз, а
+# повтор безвреден — отдаётся текущее состояние, а не сама запись журнала.
+SETTLE_SECONDS = 5
+# Больше изменённых объектов за раз — дешевле отдать полный снимок
+MAX_DELTA_IDS = 500
+
+REMINDER_COLUMNS = ('id', 'text', 'time', 'repeat', 'is_habit', 'habit_streak', 'best_streak')
+COMPLETION_COLUMNS = ('id', 'reminder_id', 'completion_date')
+
+
+def _rows(conn, sql, params, columns):
+    return [dict(zip(columns, row)) for row in conn.execute(sql, params).fetchall()]
+
+
+def _in(ids):
+    return ', '.join('?' * len(ids))
+
+
+def settled_cursor(conn, now=None):
+    """Наибольший id журнала, после которого не может появиться запись с меньшим id"""
+    now = time.time() if now is None else now
+    row = conn.execute("SELECT id FROM change_log WHERE created_at <= ? ORDER BY id DESC LIMIT 1",
+                       (int(now) - SETTLE_SECONDS,)).fetchone()
+    return row[0] if row else 0
+
+
+def user_version(conn, user_id):
+    """Версия данных пользователя: меняется при каждой записи в его напоминания и отметки.
+
+    (наибольший id, число записей) журнала пользователя — число ловит запись с
+    меньшим id, закоммиченную позже. Если записи пользователя уже очищены,
+    версия — начало журнала: оно больше любого удалённого id, так что старая
+    версия не повторится.
+    """
+    last, count = conn.execute("SELECT MAX(id), COUNT(*) FROM change_log WHERE user_id = ?", (user_id,)).fetchone()
+    if last is None:
+        first = conn.execute("SELECT MIN(id) FROM change_log").fetchone()[0]
+        return (first - 1 if first else 0), 0
+    return last, count
+
+
+def snapshot(conn, user_id, week_start):
+    reminders = _rows(conn, f"SELECT {', '.join(REMINDER_COLUMNS)} FROM reminders WHERE user_id = ? ORDER BY time",
+                      (user_id,), REMINDER_COLUMNS)
+    completions = _rows(conn, f"""SELECT {', '.join(COMPLETION_COLUMNS)} FROM habit_completions
+                                  WHERE user_id = ? AND completion_date >= ?""",
+                        (user_id, week_start), COMPLETION_COLUMNS)
+    return reminders, completions
+
+
+def sync(db, user_id, since, today):
+    """Изменения напоминаний и отметок пользователя после курсора since.
+
+    since=None — полный снимок. Полный снимок отдаётся и тогда, когда журнал
+    уже очищен дальше курсора или изменений слишком много (reset=True): клиент
+    заменяет своё состояние целиком. Отметки — только за последние 7 дней.
+    """
+    week_start = (today - timedelta(days=7)).isoformat()
+    result = {
+        'today': today.isoformat(),
+        'week_start': week_start,
+        'reset': since is None,
+        'deleted_reminders': [],
+        'deleted_completions': [],
+    }
+
+    with db.connection() as conn:
+        cursor = settled_cursor(conn)
+        changes = {'reminder': set(), 'completion': set()}
+        if since is not None:
+            first, last = conn.execute("SELECT MIN(id), MAX(id) FROM change_log").fetchone()
+            if since > (last or 0) or since < (first or since + 1) - 1:
+                result['reset'] = True
+            else:
+                for entity, entity_id in conn.execute(
+                        "SELECT entity, entity_id FROM change_log WHERE user_id = ? AND id > ?",
+                        (user_id, since)).fetchall():
+                    changes[entity].add(entity_id)
+                if len(changes['reminder']) + len(changes['completion']) > MAX_DELTA_IDS:
+                    result['reset'] = True
+
+        if result['reset']:
+            result['reminders'], result['completions'] = snapshot(conn, user_id, week_start)
+            result['cursor'] = cursor
+            return result
+
+        reminder_ids = sorted(changes['reminder'])
+        completion_ids = sorted(changes['completion'])
+        result['reminders'] = _rows(
+            conn, f"SELECT {', '.join(REMINDER_COLUMNS)} FROM reminders WHERE user_id = ? AND id IN ({_in(reminder_ids)})",
+            (user_id, *reminder_ids), REMINDER_COLUMNS) if reminder_ids else []
+        result['completions'] = _rows(
+            conn, f"""SELECT {', '.join(COMPLETION_COLUMNS)} FROM habit_completions
+                      WHERE user_id = ? AND completion_date >= ? AND id IN ({_in(completion_ids)})""",
+            (user_id, week_start, *completion_ids), COMPLETION_COLUMNS) if completion_ids else []
+
+    present = {row['id'] for row in result['reminders']}
+    result['deleted_reminders'] = [reminder_id for reminder_id in reminder_ids if reminder_id not in present]
+    present = {row['id'] for row in result['completions']}
+    result['deleted_completions'] = [completion_id for completion_id in completion_ids if completion_id not in present]
+    result['cursor'] = max(since, cursor)
+    return result
+
+
+def purge_change_log(db, keep_days):
+    """Удаляет записи журнала старше keep_days; клиенты с более старым курсором получат полный снимок"""
+    cutoff = int(time.time()) - keep_days * 86400
+    db.execute("DELETE FROM change_log WHERE created_at < ?", (cutoff,), commit=True)
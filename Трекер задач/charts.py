@@ -0,0 +1,92 @@
+import datetime
+import io
+import multiprocessing
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+
+def _warm_up():
+    # matplotlib грузится в процессах рендеринга, а не в процессе бота
+    import matplotlib.figure  # noqa: F401
+
+
+def render_habit_chart(habit_name, period, dates, completed):
+    """Рисует график выполнения привычки и возвращает PNG в байтах"""
+    # Импорт здесь, а не в начале модуля: matplotlib нужен только при первом графике
+    from matplotlib.figure import Figure
+
+    # Объектный API Figure не трогает глобальное состояние pyplot и безопасен для потоков
+    fig = Figure(figsize=(10, 4))
+    ax = fig.subplots()
+    ax.bar([date.strftime('%d.%m') for date in dates], completed, color=['#4CAF50' if x else '#f44336' for x in completed])
+    ax.set_title(f"Выполнение привычки: {habit_name}\n({period})")
+    ax.set_ylabel('Выполнено')
+    ax.set_xlabel('Дни')
+    ax.set_ylim(0, 1)
+    ax.grid(axis='y', alpha=0.3)
+
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', bbox_inches='tight')
+    return buffer.getvalue()
+
+
+class ChartService:
+    """Рендер графиков в отдельных процессах с LRU-кэшем готовых PNG"""
+
+    def __init__(self, days, workers=2, cache_size=256):
+        self.days = days
+        self.workers = workers
+        self.cache_size = cache_size
+        self._executor = None
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def start(self):
+        # Процессы создаются fork'ом сразу на первом задании, поэтому пул
+        # запускается при старте, пока в процессе бота ещё нет других потоков.
+        # Результат не ждём: matplotlib импортируется в процессах в фоне
+        if self.workers and self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                 mp_context=multiprocessing.get_context('fork'),
+                                                 initializer=_warm_up)
+            self._executor.submit(int)
+
+    def _render(self, *args):
+        if self._executor is not None:
+            try:
+                return self._executor.submit(render_habit_chart, *args).result()
+            except Exception as e:
+                print(f"⚠️ Пул рендеринга недоступен, рисуем в текущем потоке: {e}")
+        return render_habit_chart(*args)
+
+    def habit_chart(self, reminder_id, stats):
+        end_date = stats['end_date']
+        dates = [end_date - timedelta(days=i) for i in range(self.days - 1, -1, -1)]
+        completion_dates = {datetime.date.fromisoformat(date) for date in stats['completions']}
+        completed = [1 if date in completion_dates else 0 for date in dates]
+
+        key = (reminder_id, stats['habit_name'], tuple(sorted(completion_dates)), dates[0], dates[-1])
+        with self._lock:
+            png = self._cache.get(key)
+            if png is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return io.BytesIO(png)
+            self.misses += 1
+
+        png = self._render(stats['habit_name'], stats['period'], dates, completed)
+
+        with self._lock:
+            self._cache[key] = png
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return io.BytesIO(png)
+
+    def invalidate(self, reminder_id):
+        with self._lock:
+            for key in [key for key in self._cache if key[0] == reminder_id]:
+                del self._cache[key]
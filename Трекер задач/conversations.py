@@ -0,0 +1,85 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+
+
+class ConversationStore:
+    """Состояние многошаговых диалогов: текущий шаг и его данные по user_id.
+
+    Состояние хранится в таблице conversation_state, поэтому переживает
+    перезапуск и видно всем процессам бота. Перед базой — LRU-кэш процесса на
+    cache_size пользователей, в том числе тех, у кого диалога нет (таких
+    большинство, а проверка идёт на каждое сообщение). Запись кэша считается
+    свежей cache_seconds: если апдейты пользователя перешли к другому процессу
+    и вернулись обратно, устаревший шаг продержится не дольше этого. Диалог
+    живёт ttl_seconds с последнего шага, потом считается брошенным.
+    """
+
+    def __init__(self, db, ttl_seconds=3600, cache_size=10000, cache_seconds=30, purge_seconds=3600):
+        self.db = db
+        self.ttl_seconds = ttl_seconds
+        self.cache_size = cache_size
+        self.cache_seconds = cache_seconds
+        self.purge_seconds = purge_seconds
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _remember(self, user_id, state, now):
+        with self._lock:
+            self._cache[user_id] = (state, now)
+            self._cache.move_to_end(user_id)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def get(self, user_id):
+        """(step, data) текущего диалога или None"""
+        now = time.time()
+        with self._lock:
+            entry = self._cache.get(user_id)
+            if entry and now - entry[1] < self.cache_seconds:
+                self._cache.move_to_end(user_id)
+                state = entry[0]
+            else:
+                entry = None
+
+        if entry is None:
+            row = self.db.execute("SELECT step, data, expires_at FROM conversation_state WHERE user_id = ?",
+                                  (user_id,), fetchone=True)
+            state = (row[0], json.loads(row[1]), row[2]) if row else None
+            self._remember(user_id, state, now)
+
+        if state is None or state[2] <= now:
+            return None
+        step, data, _ = state
+        return step, dict(data)
+
+    def set(self, user_id, step, data=None):
+        data = dict(data or {})
+        expires_at = int(time.time()) + self.ttl_seconds
+        self.db.execute(
+            """INSERT INTO conversation_state (user_id, step, data, expires_at) VALUES (?, ?, ?, ?)
+               ON CONFLICT (user_id) DO UPDATE SET step = excluded.step, data = excluded.data, expires_at = excluded.expires_at""",
+            (user_id, step, json.dumps(data, ensure_ascii=False), expires_at), commit=True)
+        self._remember(user_id, (step, data, expires_at), time.time())
+
+    def clear(self, user_id):
+        self.db.execute("DELETE FROM conversation_state WHERE user_id = ?", (user_id,), commit=True)
+        self._remember(user_id, None, time.time())
+
+    def purge(self):
+        """Удаляет брошенные диалоги"""
+        self.db.execute("DELETE FROM conversation_state WHERE expires_at <= ?", (int(time.time()),), commit=True)
+
+    def start(self):
+        thread = threading.Thread(target=self._run, daemon=True, name='conversations')
+        thread.start()
+        return thread
+
+    def _run(self):
+        while True:
+            time.sleep(self.purge_seconds)
+            try:
+                self.purge()
+            except Exception as e:
+                print(f"❌ Ошибка очистки состояний диалогов: {e}")
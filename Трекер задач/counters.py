@@ -0,0 +1,62 @@
+import datetime
+from datetime import timedelta
+
+# Таблицу counters ведут триггеры базы (миграция 13): каждая вставка и удаление
+# пользователя, напоминания или отметки меняют счётчик в той же транзакции.
+# Счётчик может лежать в нескольких строках (slot) — значение всегда сумма.
+COUNTER_QUERIES = {
+    'users': ("SELECT COUNT(*) FROM users", ()),
+    'reminders': ("SELECT COUNT(*) FROM reminders", ()),
+    'habits': ("SELECT COUNT(*) FROM reminders WHERE is_habit = 1", ()),
+}
+# Счётчики активных пользователей по дням хранятся столько дней
+ACTIVE_KEEP_DAYS = 7
+
+
+def active_counter(day):
+    return f"active:{day.isoformat()}"
+
+
+def get_counters(db, today=None):
+    """Общие счётчики и число активных за today пользователей — чтение нескольких строк, без сканирования таблиц"""
+    today = today or datetime.date.today()
+    names = [*COUNTER_QUERIES, active_counter(today)]
+    rows = db.execute(f"SELECT name, SUM(value) FROM counters WHERE name IN ({', '.join('?' * len(names))}) GROUP BY name",
+                      tuple(names), fetchall=True) or []
+    values = {name: int(value or 0) for name, value in rows}
+    result = {name: values.get(name, 0) for name in COUNTER_QUERIES}
+    result['active_today'] = values.get(active_counter(today), 0)
+    return result
+
+
+def reconcile_counters(db, today=None):
+    """Сверяет счётчики с таблицами и исправляет расхождения.
+
+    Точное значение и сумма счётчика читаются одним запросом, то есть из одного
+    снимка базы, а поправка прибавляется к счётчику, а не записывается поверх.
+    Поэтому записи, закоммиченные во время сверки, не теряются и не
+    учитываются дважды, и таблицы не блокируются. Возвращает {имя: поправка}
+    для счётчиков, которые пришлось исправить.
+    """
+    today = today or datetime.date.today()
+    queries = dict(COUNTER_QUERIES)
+    # Отметки пишутся по дате пользователя, а она может отличаться от даты сервера на день в обе стороны
+    for days_ago in (-1, 0, 1):
+        day = today - timedelta(days=days_ago)
+        queries[active_counter(day)] = ("SELECT COUNT(DISTINCT user_id) FROM habit_completions WHERE completion_date = ?",
+                                        (day.isoformat(),))
+
+    drift = {}
+    for name, (query, params) in queries.items():
+        delta = int(db.execute(f"SELECT ({query}) - COALESCE((SELECT SUM(value) FROM counters WHERE name = ?), 0)",
+                               (*params, name), fetchone=True)[0])
+        if delta:
+            db.execute("""INSERT INTO counters (name, slot, value) VALUES (?, 0, ?)
+                          ON CONFLICT (name, slot) DO UPDATE SET value = counters.value + excluded.value""",
+                       (name, delta), commit=True)
+            drift[name] = delta
+
+    # Имена active:<дата> сравниваются как строки, поэтому диапазон отсекает только старые дни
+    db.execute("DELETE FROM counters WHERE name >= 'active:' AND name < ?",
+               (active_counter(today - timedelta(days=ACTIVE_KEEP_DAYS)),), commit=True)
+    return drift
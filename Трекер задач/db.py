@@ -0,0 +1,643 @@
+import sqlite3
+import threading
+import time
+import queue
+from contextlib import contextmanager, nullcontext
+
+# Настройки соединения: WAL позволяет читать параллельно с записью,
+# synchronous=NORMAL в режиме WAL безопасен и не делает fsync на каждый коммит
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-8000",
+    "PRAGMA mmap_size=67108864",
+    "PRAGMA busy_timeout=5000",
+)
+
+
+def connect_sqlite(db_path, timeout=10.0, row_factory=None, cached_statements=256, read_only=False):
+    conn = sqlite3.connect(
+        db_path,
+        timeout=timeout,
+        check_same_thread=False,
+        cached_statements=cached_statements,
+    )
+    for pragma in SQLITE_PRAGMAS:
+        conn.execute(pragma)
+    if read_only:
+        conn.execute("PRAGMA query_only=ON")
+    if row_factory:
+        conn.row_factory = row_factory
+    return conn
+
+
+class ConnectionPool:
+    """Пул долгоживущих соединений SQLite; с connect — соединений, которые создаёт эта функция.
+
+    read_only — соединения только для чтения (PRAGMA query_only): в режиме WAL
+    они читают параллельно друг с другом и с записью.
+    """
+
+    def __init__(self, db_path, max_size=8, timeout=10.0, row_factory=None, cached_statements=256, connect=None,
+                 read_only=False):
+        self.db_path = db_path
+        self.max_size = max_size
+        self.timeout = timeout
+        self.row_factory = row_factory
+        self.cached_statements = cached_statements
+        self.read_only = read_only
+        if connect:
+            self._connect = connect
+
+        self._idle = queue.LifoQueue()
+        self._size = 0
+        self._size_lock = threading.Lock()
+        self._local = threading.local()
+
+        self._metrics_lock = threading.Lock()
+        self._checkouts = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def _connect(self):
+        return connect_sqlite(self.db_path, self.timeout, self.row_factory, self.cached_statements, self.read_only)
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._size_lock:
+            if self._size < self.max_size:
+                self._size += 1
+                create = True
+            else:
+                create = False
+
+        if create:
+            try:
+                return self._connect()
+            except Exception:
+                with self._size_lock:
+                    self._size -= 1
+                raise
+
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise sqlite3.OperationalError("Пул соединений исчерпан")
+
+    def warm(self, size=None):
+        """Заранее открывает соединения (по умолчанию max_size), чтобы первые запросы не ждали подключения"""
+        with self._size_lock:
+            create = max(0, min(size or self.max_size, self.max_size) - self._size)
+            self._size += create
+        for created in range(create):
+            try:
+                self._idle.put(self._connect())
+            except Exception:
+                with self._size_lock:
+                    self._size -= create - created
+                raise
+        return create
+
+    def _release(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        """Выдаёт соединение текущему потоку; вложенные вызовы получают то же соединение"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            self._local.depth += 1
+            try:
+                yield conn
+            finally:
+                self._local.depth -= 1
+            return
+
+        started = time.perf_counter()
+        conn = self._acquire()
+        waited = time.perf_counter() - started
+        with self._metrics_lock:
+            self._checkouts += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+
+        self._local.conn = conn
+        self._local.depth = 1
+        try:
+            yield conn
+        finally:
+            self._local.conn = None
+            self._local.depth = 0
+            self._release(conn)
+
+    def stats(self):
+        with self._metrics_lock:
+            checkouts = self._checkouts
+            wait_total = self._wait_total
+            wait_max = self._wait_max
+        return {
+            'size': self._size,
+            'max_size': self.max_size,
+            'idle': self._idle.qsize(),
+            'in_use': self._size - self._idle.qsize(),
+            'checkouts': checkouts,
+            'avg_wait_ms': round(wait_total / checkouts * 1000, 3) if checkouts else 0.0,
+            'max_wait_ms': round(wait_max * 1000, 3),
+        }
+
+    def close(self):
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._size_lock:
+                self._size -= 1
+
+
+def open_database(url, pool_size=8, dict_rows=False):
+    """Хранилище по адресу: postgresql://… — PostgreSQL, иначе путь к файлу SQLite (можно с префиксом sqlite:///).
+
+    dict_rows — строки с доступом и по индексу, и по имени столбца (sqlite3.Row / DictRow).
+    """
+    if url.startswith(('postgresql://', 'postgres://')):
+        from db_postgres import PostgresManager
+        return PostgresManager(url, pool_size=pool_size, dict_rows=dict_rows)
+    if url.startswith('sqlite:///'):
+        url = url[len('sqlite:///'):]
+    return DBManager(url, pool_size=pool_size, row_factory=sqlite3.Row if dict_rows else None)
+
+
+class _Write:
+    __slots__ = ('sql', 'params', 'fetchone', 'fetchall', 'done', 'result', 'error')
+
+    def __init__(self, sql, params, fetchone, fetchall):
+        self.sql = sql
+        self.params = params
+        self.fetchone = fetchone
+        self.fetchall = fetchall
+        self.done = False
+        self.result = None
+        self.error = None
+
+
+class WriteQueue:
+    """Запись в SQLite через одно соединение с групповым коммитом.
+
+    Если соединение записи свободно, запрос выполняется сразу с обычным commit.
+    Иначе он ставится в очередь, а поток ждёт блокировку записи. Кто её
+    получил, выполняет всё, что накопилось в очереди (до max_batch), одной
+    транзакцией с одним commit — в том числе запросы потоков, которые ещё ждут:
+    они найдут свой результат готовым. Каждый запрос пачки идёт в своём
+    SAVEPOINT, поэтому ошибка одного не откатывает остальные.
+    """
+
+    def __init__(self, conn, lock, max_batch=256):
+        self.conn = conn
+        self.lock = lock
+        self.max_batch = max_batch
+        self._queue = queue.SimpleQueue()
+        self.batches = 0
+        self.statements = 0
+
+    def execute(self, sql, params=(), fetchone=False, fetchall=False):
+        write = _Write(sql, params, fetchone, fetchall)
+        if self.lock.acquire(blocking=False):
+            try:
+                self._run_batch([write] + self._take_batch(self.max_batch - 1))
+            finally:
+                self.lock.release()
+        else:
+            self._queue.put(write)
+            with self.lock:
+                while not write.done:
+                    self._run_batch(self._take_batch(self.max_batch))
+        if write.error is not None:
+            raise write.error
+        return write.result
+
+    def _take_batch(self, limit):
+        batch = []
+        while len(batch) < limit:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run_batch(self, batch):
+        if not batch:
+            return
+        try:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                if len(batch) == 1:
+                    # Одиночный запрос откатывать отдельно не нужно: его ошибка откатит всю транзакцию
+                    self._run_one(batch[0])
+                else:
+                    for write in batch:
+                        self.conn.execute("SAVEPOINT write_queue")
+                        try:
+                            self._run_one(write)
+                            self.conn.execute("RELEASE write_queue")
+                        except sqlite3.Error as e:
+                            self.conn.execute("ROLLBACK TO write_queue")
+                            self.conn.execute("RELEASE write_queue")
+                            write.error = e
+                self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+        except Exception as e:
+            for write in batch:
+                write.result, write.error = None, e
+        self.batches += 1
+        self.statements += len(batch)
+        # Результаты видны ожидающим только после коммита
+        for write in batch:
+            write.done = True
+
+    def _run_one(self, write):
+        c = self.conn.execute(write.sql, write.params)
+        if write.fetchone:
+            write.result = c.fetchone()
+        elif write.fetchall:
+            write.result = c.fetchall()
+
+
+class DBManager:
+    """Хранилище на SQLite. Тот же интерфейс у PostgresManager (db_postgres.py):
+    execute(), transaction(), connection(), pool.stats(). SQL в коде пишется на
+    диалекте SQLite из общего с PostgreSQL подмножества; для PostgreSQL его переводит translate_sql.
+
+    Чтение (execute без commit, connection()) идёт через пул соединений только
+    для чтения и ничем не блокируется. Запись — через одно соединение:
+    execute(commit=True) идёт через WriteQueue, transaction() занимает
+    соединение записи на время блока. Внутри transaction() вызовы execute()
+    и вложенный transaction() того же потока идут в открытую транзакцию и
+    фиксируются вместе с ней, а не ждут блокировку, которую держит сам поток.
+    """
+
+    def __init__(self, db_path, pool_size=8, row_factory=None):
+        self.db_path = db_path
+        self.pool = ConnectionPool(db_path, max_size=pool_size, row_factory=row_factory, read_only=True)
+        self.write_lock = threading.Lock()
+        self.write_conn = connect_sqlite(db_path, row_factory=row_factory)
+        self._tx = threading.local()
+        self.init_db_structure()
+        self.writer = WriteQueue(self.write_conn, self.write_lock)
+
+    def connection(self):
+        """Соединение только для чтения; запись — через transaction()"""
+        return self.pool.connection()
+
+    def execute(self, sql, params=(), commit=False, fetchone=False, fetchall=False):
+        try:
+            tx_conn = getattr(self._tx, 'conn', None)
+            if commit and tx_conn is None:
+                return self.writer.execute(sql, params, fetchone, fetchall)
+            # В открытой транзакции потока запрос видит её изменения, а коммит делает сама транзакция
+            with nullcontext(tx_conn) if tx_conn is not None else self.pool.connection() as conn:
+                c = conn.execute(sql, params)
+                if fetchone:
+                    return c.fetchone()
+                if fetchall:
+                    return c.fetchall()
+                return None
+        except sqlite3.Error as e:
+            print(f"Database error in execute: {e}")
+            return None
+
+    @contextmanager
+    def transaction(self):
+        """Единица работы: все запросы внутри блока фиксируются одним коммитом"""
+        if getattr(self._tx, 'conn', None) is not None:
+            yield self._tx.conn
+            return
+        with self.write_lock:
+            conn = self.write_conn
+            conn.execute("BEGIN IMMEDIATE")
+            self._tx.conn = conn
+            try:
+                yield conn
+            except Exception:
+                conn.rollback()
+                raise
+            else:
+                conn.commit()
+            finally:
+                self._tx.conn = None
+
+    def init_db_structure(self):
+        version = self.migrate()
+        print(f"✅ База данных готова (версия схемы {version})")
+
+    def migrate(self):
+        """Применяет недостающие миграции из MIGRATIONS по PRAGMA user_version"""
+        with self.write_lock:
+            conn = self.write_conn
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            for target, statements in MIGRATIONS:
+                if target <= version:
+                    continue
+                # Бот и веб-API стартуют одновременно: берём блокировку записи
+                # и перечитываем версию, чтобы миграцию применил только один процесс
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    version = conn.execute("PRAGMA user_version").fetchone()[0]
+                    if target > version:
+                        for sql in statements:
+                            conn.execute(sql)
+                        conn.execute(f"PRAGMA user_version = {target}")
+                        version = target
+                        print(f"🛠 Применена миграция {target}")
+                except Exception:
+                    conn.rollback()
+                    raise
+                conn.commit()
+        return version
+
+
+# === МИГРАЦИИ ===
+# Каждая миграция — (номер версии, список SQL). Новые добавляются только в конец.
+MIGRATIONS = [
+    (1, [
+        '''CREATE TABLE IF NOT EXISTS users (
+            user_id INTEGER PRIMARY KEY,
+            username TEXT,
+            joined_at TEXT
+        )''',
+        '''CREATE TABLE IF NOT EXISTS reminders (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            text TEXT,
+            time TEXT,
+            repeat TEXT,
+            created_at TEXT,
+            last_sent TEXT,
+            next_send TEXT,
+            is_habit BOOLEAN DEFAULT 0,
+            habit_streak INTEGER DEFAULT 0,
+            retry_count INTEGER DEFAULT 0,
+            last_reminder_sent TEXT,
+            FOREIGN KEY (user_id) REFERENCES users (user_id)
+        )''',
+        '''CREATE TABLE IF NOT EXISTS habit_completions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            reminder_id INTEGER,
+            completion_date TEXT,
+            completion_time TEXT,
+            created_at TEXT,
+            FOREIGN KEY (user_id) REFERENCES users (user_id),
+            FOREIGN KEY (reminder_id) REFERENCES reminders (id)
+        )''',
+        '''CREATE TABLE IF NOT EXISTS user_stats (
+            user_id INTEGER PRIMARY KEY,
+            water_reminders_completed INTEGER DEFAULT 0,
+            total_habits_completed INTEGER DEFAULT 0,
+            last_daily_report TEXT,
+            FOREIGN KEY (user_id) REFERENCES users (user_id)
+        )''',
+    ]),
+    (2, [
+        "CREATE INDEX IF NOT EXISTS idx_reminders_next_send ON reminders (next_send)",
+        "CREATE INDEX IF NOT EXISTS idx_reminders_user_habit ON reminders (user_id, is_habit)",
+        "CREATE INDEX IF NOT EXISTS idx_completions_reminder_date ON habit_completions (reminder_id, completion_date)",
+        "CREATE INDEX IF NOT EXISTS idx_completions_date_user ON habit_completions (completion_date, user_id)",
+    ]),
+    (3, [
+        # Дубликаты напоминаний: отметки переносим на самое раннее, остальные удаляем
+        '''UPDATE habit_completions SET reminder_id = (
+               SELECT MIN(r2.id) FROM reminders r1
+               JOIN reminders r2 ON r2.user_id = r1.user_id AND r2.text = r1.text
+                                AND r2.time = r1.time AND r2.repeat = r1.repeat
+               WHERE r1.id = habit_completions.reminder_id)
+           WHERE reminder_id IN (SELECT id FROM reminders)''',
+        '''DELETE FROM reminders WHERE id NOT IN (
+               SELECT MIN(id) FROM reminders GROUP BY user_id, text, time, repeat)''',
+        '''DELETE FROM habit_completions WHERE id NOT IN (
+               SELECT MIN(id) FROM habit_completions GROUP BY user_id, reminder_id, completion_date)''',
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_reminders_user_text_time_repeat ON reminders (user_id, text, time, repeat)",
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_completions_user_reminder_date ON habit_completions (user_id, reminder_id, completion_date)",
+    ]),
+    (4, [
+        '''CREATE TABLE IF NOT EXISTS broadcasts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            admin_id INTEGER,
+            text TEXT,
+            status TEXT,
+            created_at TEXT,
+            finished_at TEXT
+        )''',
+        '''CREATE TABLE IF NOT EXISTS broadcast_recipients (
+            broadcast_id INTEGER,
+            user_id INTEGER,
+            status TEXT,
+            error TEXT,
+            sent_at TEXT,
+            PRIMARY KEY (broadcast_id, user_id),
+            FOREIGN KEY (broadcast_id) REFERENCES broadcasts (id)
+        )''',
+        "CREATE INDEX IF NOT EXISTS idx_broadcast_recipients_status ON broadcast_recipients (broadcast_id, status)",
+    ]),
+    (5, [
+        "ALTER TABLE reminders ADD COLUMN best_streak INTEGER DEFAULT 0",
+        "ALTER TABLE reminders ADD COLUMN last_completion_date TEXT",
+        '''UPDATE reminders SET
+               best_streak = COALESCE(habit_streak, 0),
+               last_completion_date = (SELECT MAX(completion_date) FROM habit_completions hc WHERE hc.reminder_id = reminders.id)
+           WHERE is_habit = 1''',
+    ]),
+    (6, [
+        "ALTER TABLE reminders ADD COLUMN rrule_freq TEXT",
+        "ALTER TABLE reminders ADD COLUMN rrule_interval INTEGER",
+        "ALTER TABLE reminders ADD COLUMN rrule_weekdays INTEGER",
+        "ALTER TABLE reminders ADD COLUMN rrule_anchor TEXT",
+        "UPDATE reminders SET rrule_anchor = date(COALESCE(next_send, created_at, 'now'))",
+        # Маски дней недели: бит 0 — понедельник (strftime('%w') считает с воскресенья)
+        '''UPDATE reminders SET
+               rrule_freq = CASE repeat
+                   WHEN '1 раз' THEN 'once'
+                   WHEN 'раз в месяц' THEN 'monthly'
+                   WHEN 'раз в неделю' THEN 'weekly'
+                   WHEN 'раз в 2 недели' THEN 'weekly'
+                   WHEN 'по рабочим дням (Пн-Пт)' THEN 'weekly'
+                   WHEN 'по выходным' THEN 'weekly'
+                   WHEN 'каждую среду и пятницу' THEN 'weekly'
+                   ELSE 'daily' END,
+               rrule_interval = CASE repeat
+                   WHEN 'раз в 2 дня' THEN 2
+                   WHEN 'раз в 2 недели' THEN 2
+                   ELSE 1 END,
+               rrule_weekdays = CASE repeat
+                   WHEN 'по рабочим дням (Пн-Пт)' THEN 31
+                   WHEN 'по выходным' THEN 96
+                   WHEN 'каждую среду и пятницу' THEN 20
+                   WHEN 'раз в неделю' THEN 1 << ((CAST(strftime('%w', rrule_anchor) AS INTEGER) + 6) % 7)
+                   WHEN 'раз в 2 недели' THEN 1 << ((CAST(strftime('%w', rrule_anchor) AS INTEGER) + 6) % 7)
+                   ELSE 127 END''',
+    ]),
+    (7, [
+        "ALTER TABLE users ADD COLUMN timezone TEXT",
+        # next_send_at — UTC epoch в секундах; старый next_send хранил местное время сервера
+        "ALTER TABLE reminders ADD COLUMN next_send_at INTEGER",
+        "UPDATE reminders SET next_send_at = CAST(strftime('%s', next_send, 'utc') AS INTEGER) WHERE next_send IS NOT NULL",
+        "DROP INDEX IF EXISTS idx_reminders_next_send",
+        "CREATE INDEX IF NOT EXISTS idx_reminders_next_send_at ON reminders (next_send_at)",
+        # Столбец next_send больше не используется; DROP COLUMN требует SQLite 3.35+, поэтому только очищаем
+        "UPDATE reminders SET next_send = NULL",
+    ]),
+    (8, [
+        # Очередь отправок: одна строка на срабатывание напоминания (reminder_id, due_at)
+        '''CREATE TABLE IF NOT EXISTS reminder_outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            reminder_id INTEGER,
+            user_id INTEGER,
+            due_at INTEGER,
+            kind TEXT,
+            text TEXT,
+            status TEXT,
+            attempts INTEGER DEFAULT 0,
+            available_at INTEGER,
+            claimed_by TEXT,
+            claimed_at INTEGER,
+            sent_at INTEGER,
+            error TEXT,
+            created_at INTEGER,
+            UNIQUE (reminder_id, due_at)
+        )''',
+        "CREATE INDEX IF NOT EXISTS idx_reminder_outbox_status ON reminder_outbox (status, available_at)",
+    ]),
+    (9, [
+        # Аренда частей пользователей (user_id % N) процессами планировщика
+        '''CREATE TABLE IF NOT EXISTS scheduler_shards (
+            shard INTEGER PRIMARY KEY,
+            owner TEXT,
+            lease_until INTEGER
+        )''',
+        '''CREATE TABLE IF NOT EXISTS scheduler_workers (
+            owner TEXT PRIMARY KEY,
+            heartbeat_at INTEGER
+        )''',
+    ]),
+    (10, [
+        # Шаг многошагового диалога пользователя (ConversationStore), data — JSON
+        '''CREATE TABLE IF NOT EXISTS conversation_state (
+            user_id INTEGER PRIMARY KEY,
+            step TEXT,
+            data TEXT,
+            expires_at INTEGER
+        )''',
+    ]),
+    (11, [
+        # Журнал изменений для синхронизации Mini App (/api/sync). Пишется триггерами,
+        # поэтому в него попадает любая запись — из бота, планировщика и веб-API.
+        # Изменения служебных полей (next_send_at, retry_count и т.п.) клиенту не нужны и не пишутся
+        '''CREATE TABLE IF NOT EXISTS change_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            entity TEXT,
+            entity_id INTEGER,
+            op TEXT,
+            created_at INTEGER
+        )''',
+        "CREATE INDEX IF NOT EXISTS idx_change_log_user ON change_log (user_id, id)",
+        '''CREATE TRIGGER IF NOT EXISTS trg_reminders_insert_log AFTER INSERT ON reminders
+           BEGIN
+               INSERT INTO change_log (user_id, entity, entity_id, op, created_at)
+               VALUES (NEW.user_id, 'reminder', NEW.id, 'insert', CAST(strftime('%s', 'now') AS INTEGER));
+           END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_reminders_update_log
+           AFTER UPDATE OF text, time, repeat, is_habit, habit_streak, best_streak ON reminders
+           WHEN OLD.text IS NOT NEW.text OR OLD.time IS NOT NEW.time OR OLD.repeat IS NOT NEW.repeat
+             OR OLD.is_habit IS NOT NEW.is_habit OR OLD.habit_streak IS NOT NEW.habit_streak
+             OR OLD.best_streak IS NOT NEW.best_streak
+           BEGIN
+               INSERT INTO change_log (user_id, entity, entity_id, op, created_at)
+               VALUES (NEW.user_id, 'reminder', NEW.id, 'update', CAST(strftime('%s', 'now') AS INTEGER));
+           END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_reminders_delete_log AFTER DELETE ON reminders
+           BEGIN
+               INSERT INTO change_log (user_id, entity, entity_id, op, created_at)
+               VALUES (OLD.user_id, 'reminder', OLD.id, 'delete', CAST(strftime('%s', 'now') AS INTEGER));
+           END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_completions_insert_log AFTER INSERT ON habit_completions
+           BEGIN
+               INSERT INTO change_log (user_id, entity, entity_id, op, created_at)
+               VALUES (NEW.user_id, 'completion', NEW.id, 'insert', CAST(strftime('%s', 'now') AS INTEGER));
+           END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_completions_delete_log AFTER DELETE ON habit_completions
+           BEGIN
+               INSERT INTO change_log (user_id, entity, entity_id, op, created_at)
+               VALUES (OLD.user_id, 'completion', OLD.id, 'delete', CAST(strftime('%s', 'now') AS INTEGER));
+           END''',
+    ]),
+    (12, [
+        # Индексы под постраничный вывод по ключу: список пользователей админа
+        # (новые сверху) и /api/reminders (по времени)
+        "CREATE INDEX IF NOT EXISTS idx_users_joined ON users (joined_at, user_id)",
+        "CREATE INDEX IF NOT EXISTS idx_reminders_user_time ON reminders (user_id, time, id)",
+    ]),
+    (13, [
+        # Счётчики для статистики администратора (counters.py). Ведутся триггерами в той же
+        # транзакции, что и сама запись; active:<дата> — число пользователей с отметками за день
+        '''CREATE TABLE IF NOT EXISTS counters (
+            name TEXT,
+            slot INTEGER,
+            value INTEGER,
+            PRIMARY KEY (name, slot)
+        )''',
+        "INSERT INTO counters (name, slot, value) SELECT 'users', 0, COUNT(*) FROM users",
+        "INSERT INTO counters (name, slot, value) SELECT 'reminders', 0, COUNT(*) FROM reminders",
+        "INSERT INTO counters (name, slot, value) SELECT 'habits', 0, COUNT(*) FROM reminders WHERE is_habit = 1",
+        '''INSERT INTO counters (name, slot, value)
+           SELECT 'active:' || completion_date, 0, COUNT(DISTINCT user_id) FROM habit_completions
+           WHERE completion_date >= date('now', '-1 day') GROUP BY completion_date''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_users_insert_count AFTER INSERT ON users
+           BEGIN
+               UPDATE counters SET value = value + 1 WHERE name = 'users' AND slot = 0;
+           END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_users_delete_count AFTER DELETE ON users
+           BEGIN
+               UPDATE counters SET value = value - 1 WHERE name = 'users' AND slot = 0;
+           END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_reminders_insert_count AFTER INSERT ON reminders
+           BEGIN
+               UPDATE counters SET value = value + 1 WHERE name = 'reminders' AND slot = 0;
+               UPDATE counters SET value = value + 1 WHERE name = 'habits' AND slot = 0 AND NEW.is_habit = 1;
+           END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_reminders_delete_count AFTER DELETE ON reminders
+           BEGIN
+               UPDATE counters SET value = value - 1 WHERE name = 'reminders' AND slot = 0;
+               UPDATE counters SET value = value - 1 WHERE name = 'habits' AND slot = 0 AND OLD.is_habit = 1;
+           END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_reminders_habit_count AFTER UPDATE OF is_habit ON reminders
+           WHEN (OLD.is_habit = 1) IS NOT (NEW.is_habit = 1)
+           BEGIN
+               UPDATE counters SET value = value + (CASE WHEN NEW.is_habit = 1 THEN 1 ELSE -1 END)
+               WHERE name = 'habits' AND slot = 0;
+           END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_completions_insert_count AFTER INSERT ON habit_completions
+           WHEN NOT EXISTS (SELECT 1 FROM habit_completions
+                            WHERE completion_date = NEW.completion_date AND user_id = NEW.user_id AND id != NEW.id)
+           BEGIN
+               INSERT INTO counters (name, slot, value) VALUES ('active:' || NEW.completion_date, 0, 1)
+               ON CONFLICT (name, slot) DO UPDATE SET value = value + 1;
+           END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_completions_delete_count AFTER DELETE ON habit_completions
+           WHEN NOT EXISTS (SELECT 1 FROM habit_completions
+                            WHERE completion_date = OLD.completion_date AND user_id = OLD.user_id)
+           BEGIN
+               UPDATE counters SET value = value - 1 WHERE name = 'active:' || OLD.completion_date AND slot = 0;
+           END''',
+    ]),
+]
@@ -0,0 +1,113 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+class TokenBucket:
+    """Ограничитель скорости: rate токенов в секунду, запас не больше capacity"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait = (tokens - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class DeliveryPool:
+    """Пул потоков для отправки сообщений с учётом лимитов Telegram.
+
+    Задачи одного чата выполняются последовательно и не чаще chat_rate в секунду,
+    все отправки вместе — не чаще global_rate в секунду.
+    """
+
+    def __init__(self, workers=8, global_rate=30, chat_rate=1, max_chats=10000):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='delivery')
+        self.global_bucket = TokenBucket(global_rate)
+        self.chat_rate = chat_rate
+        self.max_chats = max_chats
+        self._chat_buckets = OrderedDict()
+        self._chat_lock = threading.Lock()
+
+    def _chat_bucket(self, chat_id):
+        with self._chat_lock:
+            bucket = self._chat_buckets.get(chat_id)
+            if bucket is None:
+                bucket = TokenBucket(self.chat_rate, 1)
+                self._chat_buckets[chat_id] = bucket
+                if len(self._chat_buckets) > self.max_chats:
+                    self._chat_buckets.popitem(last=False)
+            else:
+                self._chat_buckets.move_to_end(chat_id)
+            return bucket
+
+    def throttle(self, chat_id):
+        self._chat_bucket(chat_id).acquire()
+        self.global_bucket.acquire()
+
+    def _run_chat(self, chat_id, jobs, started):
+        latencies = []
+        failed = 0
+        for job in jobs:
+            self.throttle(chat_id)
+            try:
+                if job() is False:
+                    failed += 1
+            except Exception as e:
+                print(f"❌ Ошибка доставки в чат {chat_id}: {e}")
+                failed += 1
+            latencies.append(time.perf_counter() - started)
+        return latencies, failed
+
+    def run_batch(self, jobs):
+        """Выполняет пакет задач [(chat_id, callable)] и возвращает статистику задержек"""
+        started = time.perf_counter()
+        by_chat = OrderedDict()
+        for chat_id, job in jobs:
+            by_chat.setdefault(chat_id, []).append(job)
+
+        futures = [self.executor.submit(self._run_chat, chat_id, chat_jobs, started)
+                   for chat_id, chat_jobs in by_chat.items()]
+
+        latencies = []
+        failed = 0
+        for future in futures:
+            chat_latencies, chat_failed = future.result()
+            latencies.extend(chat_latencies)
+            failed += chat_failed
+
+        return batch_stats(latencies, failed, time.perf_counter() - started)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
+
+
+def batch_stats(latencies, failed, duration):
+    latencies = sorted(latencies)
+
+    def percentile(p):
+        if not latencies:
+            return 0.0
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))]
+
+    return {
+        'total': len(latencies),
+        'failed': failed,
+        'duration': round(duration, 3),
+        'p50': round(percentile(0.5), 3),
+        'p95': round(percentile(0.95), 3),
+        'max': round(latencies[-1], 3) if latencies else 0.0,
+    }
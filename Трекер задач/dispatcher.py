@@ -0,0 +1,58 @@
+import queue
+import threading
+
+
+def update_chat_id(update):
+    """Чат, к которому относится апдейт Telegram; по нему апдейты распределяются между потоками"""
+    if update.message:
+        return update.message.chat.id
+    if update.edited_message:
+        return update.edited_message.chat.id
+    if update.callback_query:
+        if update.callback_query.message:
+            return update.callback_query.message.chat.id
+        return update.callback_query.from_user.id
+    return update.update_id
+
+
+class UpdateDispatcher:
+    """Обрабатывает апдейты в нескольких потоках.
+
+    Каждый чат закреплён за одним потоком, поэтому апдейты одного чата
+    обрабатываются строго по порядку, а разные чаты — параллельно.
+    """
+
+    def __init__(self, handler, workers=8, queue_size=10000):
+        self.handler = handler
+        self.queues = [queue.Queue(maxsize=queue_size) for _ in range(workers)]
+        self.threads = []
+        self.processed = 0
+        self._lock = threading.Lock()
+
+    def start(self):
+        for i, updates in enumerate(self.queues):
+            thread = threading.Thread(target=self._work, args=(updates,), daemon=True, name=f'dispatcher-{i}')
+            thread.start()
+            self.threads.append(thread)
+
+    def submit(self, update):
+        self.queues[hash(update_chat_id(update)) % len(self.queues)].put(update)
+
+    def pending(self):
+        return sum(updates.qsize() for updates in self.queues)
+
+    def _work(self, updates):
+        while True:
+            update = updates.get()
+            try:
+                self.handler(update)
+            except Exception as e:
+                print(f"❌ Ошибка обработки апдейта {update.update_id}: {e}")
+            finally:
+                with self._lock:
+                    self.processed += 1
+                updates.task_done()
+
+    def join(self):
+        for updates in self.queues:
+            updates.join()
@@ -0,0 +1,168 @@
+"""Локальная заглушка Telegram Bot API и замер пропускной способности обработки апдейтов.
+
+    python fake_telegram.py [--updates 500] [--chats 50] [--latency 0.02] [--workers 8]
+
+Заглушка отвечает на sendMessage, editMessageText, answerCallbackQuery и прочие
+методы с задержкой --latency (имитация сети до Telegram). Апдейты подаются
+через вебхук-эндпоинт и обрабатываются UpdateDispatcher: сначала одним потоком
+(как при long polling), затем --workers потоками.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+class FakeTelegram:
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+        self._message_id = 0
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler_class())
+        self.server.daemon_threads = True
+
+    @property
+    def api_url(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}/bot{{0}}/{{1}}"
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+
+    def _result(self, method, params):
+        if method in ('sendMessage', 'editMessageText', 'sendPhoto', 'editMessageReplyMarkup'):
+            with self._lock:
+                self._message_id += 1
+                message_id = self._message_id
+            chat_id = int(params.get('chat_id') or 0)
+            return {
+                'message_id': message_id,
+                'date': int(time.time()),
+                'chat': {'id': chat_id, 'type': 'private'},
+                'text': params.get('text', ''),
+            }
+        if method == 'getMe':
+            return {'id': 1, 'is_bot': True, 'first_name': 'Loopmatic', 'username': 'loopmatic_bot'}
+        if method == 'getUpdates':
+            return []
+        return True
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                url = urlsplit(self.path)
+                method = url.path.rsplit('/', 1)[-1]
+                params = dict(parse_qsl(url.query))
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length).decode('utf-8', 'replace') if length else ''
+                content_type = self.headers.get('Content-Type', '')
+                if content_type.startswith('application/json') and body:
+                    params.update(json.loads(body))
+                elif body and content_type.startswith('application/x-www-form-urlencoded'):
+                    params.update(parse_qsl(body))
+
+                if fake.latency:
+                    time.sleep(fake.latency)
+                with fake._lock:
+                    fake.calls += 1
+
+                payload = json.dumps({'ok': True, 'result': fake._result(method, params)}).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            do_GET = do_POST
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def make_updates(count, chats, first_update_id=1):
+    updates = []
+    for i in range(count):
+        chat_id = 100000 + i % chats
+        updates.append({
+            'update_id': first_update_id + i,
+            'message': {
+                'message_id': i + 1,
+                'date': int(time.time()),
+                'chat': {'id': chat_id, 'type': 'private'},
+                'from': {'id': chat_id, 'is_bot': False, 'first_name': 'Тест'},
+                'text': '📋 Мои напоминания',
+            },
+        })
+    return updates
+
+
+def run_benchmark(bot_module, updates, workers):
+    from dispatcher import UpdateDispatcher
+    from webhook import create_webhook_app
+
+    dispatcher = UpdateDispatcher(lambda update: bot_module.bot.process_new_updates([update]), workers=workers)
+    dispatcher.start()
+    client = create_webhook_app(dispatcher, secret_token='').test_client()
+
+    started = time.perf_counter()
+    for update in updates:
+        client.post('/telegram/webhook', data=json.dumps(update), content_type='application/json')
+    dispatcher.join()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--updates', type=int, default=500)
+    parser.add_argument('--chats', type=int, default=50)
+    parser.add_argument('--latency', type=float, default=0.02)
+    parser.add_argument('--workers', type=int, default=8)
+    args = parser.parse_args()
+
+    fake = FakeTelegram(latency=args.latency).start()
+
+    import telebot
+    telebot.apihelper.API_URL = fake.api_url
+
+    sys.path.insert(0, HERE)
+    workdir = tempfile.mkdtemp()
+    os.chdir(workdir)
+    import bot as bot_module
+    # Запросы уходят в заглушку, настоящий токен не нужен
+    bot_module.bot.token = '123456:fake'
+    bot_module.bot.threaded = False
+
+    for user_id in range(100000, 100000 + args.chats):
+        bot_module.add_user(user_id, f"user{user_id}")
+        bot_module.add_reminder(user_id, "Пить воду", "09:00", "ежедневно", is_habit=True)
+
+    print(f"Апдейтов: {args.updates}, чатов: {args.chats}, задержка API: {args.latency * 1000:.0f} мс")
+    first_id = 1
+    for workers in sorted({1, args.workers}):
+        updates = make_updates(args.updates, args.chats, first_id)
+        first_id += args.updates
+        calls_before = fake.calls
+        elapsed = run_benchmark(bot_module, updates, workers)
+        print(f"потоков {workers}: {elapsed:.2f} с, {args.updates / elapsed:.0f} апдейтов/с, "
+              f"вызовов API: {fake.calls - calls_before}")
+
+    fake.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,30 @@
+"""Продакшен-запуск веб-API Mini App:
+
+    gunicorn -c gunicorn.conf.py
+
+Несколько процессов-воркеров, в каждом — потоки (gthread). Приложение
+загружается в каждом воркере после fork, поэтому пул соединений с базой у
+воркера свой; он открывается целиком до первого запроса. Число воркеров и
+потоков задаётся переменными WEBAPP_WORKERS и WEBAPP_THREADS, адрес — WEBAPP_BIND.
+"""
+import multiprocessing
+import os
+
+wsgi_app = 'webapp_api:app'
+bind = os.environ.get('WEBAPP_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('WEBAPP_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+worker_class = 'gthread'
+threads = int(os.environ.get('WEBAPP_THREADS', 8))
+keepalive = 5
+# Соединения SQLite и PostgreSQL нельзя разделять между процессами: без preload
+# каждый воркер сам импортирует webapp_api и открывает свою базу
+preload_app = False
+accesslog = None
+errorlog = '-'
+
+
+def post_worker_init(worker):
+    import webapp_api
+
+    opened = webapp_api.DB_MANAGER.pool.warm()
+    worker.log.info("Воркер %s: открыто соединений с базой: %s", worker.pid, opened)
@@ -0,0 +1,163 @@
+import datetime
+import sys
+from datetime import timedelta
+
+from recurrence import ALL_DAYS, DAILY, DEFAULT_REPEAT_RULE, MONTHLY, REPEAT_RULES, WEEKLY
+from timezones import get_timezone, local_now
+
+WATER_KEYWORDS = ("пить воду", "стакан воды")
+
+
+def is_water_habit(text):
+    text = text.lower()
+    return any(keyword in text for keyword in WATER_KEYWORDS)
+
+
+def streak_gaps(repeat):
+    """Для каждого дня недели — сколько дней назад было предыдущее ожидаемое выполнение"""
+    freq, interval, weekdays = REPEAT_RULES.get(repeat, DEFAULT_REPEAT_RULE)
+    if freq == WEEKLY and weekdays is None:
+        return [7 * interval] * 7
+    if freq == MONTHLY:
+        return [31 * interval] * 7
+    if freq == DAILY and interval > 1:
+        return [interval] * 7
+    if freq != WEEKLY:
+        weekdays = ALL_DAYS
+    gaps = []
+    for weekday in range(7):
+        gap = 1
+        while not weekdays & (1 << ((weekday - gap) % 7)):
+            gap += 1
+        gaps.append(gap)
+    return gaps
+
+
+def previous_due_date(repeat, date):
+    return date - timedelta(days=streak_gaps(repeat)[date.weekday()])
+
+
+def continues_streak(repeat, last_completion_date, date):
+    """Продолжает ли выполнение в date серию, последнее выполнение которой было в last_completion_date"""
+    if not last_completion_date:
+        return False
+    return datetime.date.fromisoformat(last_completion_date) >= previous_due_date(repeat, date)
+
+
+def complete_habit(db, user_id, reminder_id, now=None):
+    """Отмечает выполнение привычки за сегодня одной транзакцией.
+
+    Возвращает новый стрик или None, если привычка уже отмечена сегодня.
+    «Сегодня» считается в часовом поясе пользователя, если now не передан.
+    """
+    with db.transaction() as conn:
+        habit = conn.execute("""SELECT r.text, r.repeat, r.habit_streak, r.best_streak, r.last_completion_date, u.timezone
+                                FROM reminders r LEFT JOIN users u ON u.user_id = r.user_id
+                                WHERE r.id = ? AND r.user_id = ?""",
+                             (reminder_id, user_id)).fetchone()
+        if not habit:
+            raise ValueError("Привычка не найдена")
+        text, repeat, streak, best_streak, last_completion_date, timezone = habit
+        now = now or local_now(get_timezone(timezone))
+        today = now.date()
+
+        # Вторая отметка за день отсекается уникальным индексом (user_id, reminder_id, completion_date)
+        inserted = conn.execute("INSERT OR IGNORE INTO habit_completions (user_id, reminder_id, completion_date, completion_time, created_at) VALUES (?, ?, ?, ?, ?)",
+                                (user_id, reminder_id, today.isoformat(), now.strftime('%H:%M'), now.isoformat())).rowcount
+        if not inserted:
+            return None
+
+        if is_water_habit(text):
+            conn.execute("UPDATE user_stats SET water_reminders_completed = water_reminders_completed + 1 WHERE user_id = ?", (user_id,))
+        conn.execute("UPDATE user_stats SET total_habits_completed = total_habits_completed + 1 WHERE user_id = ?", (user_id,))
+
+        new_streak = (streak or 0) + 1 if continues_streak(repeat, last_completion_date, today) else 1
+        conn.execute("UPDATE reminders SET habit_streak = ?, best_streak = ?, last_completion_date = ? WHERE id = ?",
+                     (new_streak, max(best_streak or 0, new_streak), today.isoformat(), reminder_id))
+
+    return new_streak
+
+
+def expire_streaks(db, now=None):
+    """Обнуляет стрики привычек, пропустивших последнее ожидаемое выполнение.
+
+    Ожидаемый день считается от сегодняшней даты в поясе пользователя, поэтому
+    привычки группируются по (пояс, повтор); now — UTC epoch.
+    """
+    groups = db.execute("""SELECT DISTINCT u.timezone, r.repeat FROM reminders r LEFT JOIN users u ON u.user_id = r.user_id
+                           WHERE r.is_habit = 1 AND r.habit_streak > 0""", fetchall=True) or []
+    expired = 0
+    with db.transaction() as conn:
+        for timezone, repeat in groups:
+            today = local_now(get_timezone(timezone), now).date()
+            cutoff = previous_due_date(repeat, today).isoformat()
+            expired += conn.execute("""UPDATE reminders SET habit_streak = 0
+                                       WHERE is_habit = 1 AND repeat IS ? AND habit_streak > 0
+                                         AND (SELECT timezone FROM users u WHERE u.user_id = reminders.user_id) IS ?
+                                         AND (last_completion_date IS NULL OR last_completion_date < ?)""",
+                                    (repeat, timezone, cutoff)).rowcount
+    return expired
+
+
+def backfill_streaks(db, today=None):
+    """Пересчитывает текущий и лучший стрик всех привычек по habit_completions за один проход"""
+    import numpy as np
+
+    today = today or datetime.date.today()
+    habits = db.execute("SELECT id, repeat FROM reminders WHERE is_habit = 1", fetchall=True) or []
+    if not habits:
+        return 0
+
+    repeats = sorted({repeat for _, repeat in habits}, key=str)
+    rule_index = {repeat: i for i, repeat in enumerate(repeats)}
+    gap_table = np.array([streak_gaps(repeat) for repeat in repeats], dtype=np.int64)
+    habit_rule = {habit_id: rule_index[repeat] for habit_id, repeat in habits}
+
+    rows = db.execute("""SELECT hc.reminder_id, hc.completion_date FROM habit_completions hc
+                         JOIN reminders r ON r.id = hc.reminder_id AND r.is_habit = 1
+                         ORDER BY hc.reminder_id, hc.completion_date""", fetchall=True) or []
+
+    updates = {habit_id: (0, 0, None) for habit_id, _ in habits}
+    if rows:
+        ids = np.array([row[0] for row in rows], dtype=np.int64)
+        days = np.array([row[1] for row in rows], dtype='datetime64[D]').astype(np.int64)
+        rules = np.array([habit_rule[habit_id] for habit_id in ids.tolist()], dtype=np.int64)
+        # 1970-01-01 — четверг, отсюда сдвиг на 3 до понедельника
+        weekdays = (days + 3) % 7
+
+        # Выполнение продолжает серию, если предыдущее было у той же привычки
+        # не раньше предыдущего ожидаемого дня
+        allowed_from = days - gap_table[rules, weekdays]
+        continues = np.zeros(len(days), dtype=bool)
+        continues[1:] = (ids[1:] == ids[:-1]) & (days[:-1] >= allowed_from[1:])
+
+        positions = np.arange(len(days))
+        run_start = np.maximum.accumulate(np.where(continues, 0, positions))
+        run_length = positions - run_start + 1
+
+        habit_start = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+        habit_end = np.r_[habit_start[1:], len(ids)] - 1
+        best = np.maximum.reduceat(run_length, habit_start)
+
+        today_day = np.datetime64(today.isoformat(), 'D').astype(np.int64)
+        today_weekday = (today_day + 3) % 7
+        alive = days[habit_end] >= today_day - gap_table[rules[habit_end], today_weekday]
+        current = np.where(alive, run_length[habit_end], 0)
+
+        for habit_id, current_streak, best_streak, last_day in zip(
+                ids[habit_end].tolist(), current.tolist(), best.tolist(), days[habit_end].tolist()):
+            last_date = (datetime.date(1970, 1, 1) + timedelta(days=last_day)).isoformat()
+            updates[habit_id] = (current_streak, best_streak, last_date)
+
+    with db.transaction() as conn:
+        conn.executemany("UPDATE reminders SET habit_streak = ?, best_streak = ?, last_completion_date = ? WHERE id = ?",
+                         [(current, best, last_date, habit_id) for habit_id, (current, best, last_date) in updates.items()])
+    return len(updates)
+
+
+if __name__ == '__main__':
+    # python habits.py [путь к базе или postgresql://…] — полный пересчёт стриков
+    from db import open_database
+
+    count = backfill_streaks(open_database(sys.argv[1] if len(sys.argv) > 1 else 'bot_users.db'))
+    print(f"✅ Стрики пересчитаны для {count} привычек")
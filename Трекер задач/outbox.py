@@ -0,0 +1,162 @@
+import os
+import socket
+import threading
+import time
+from collections import namedtuple
+
+OutboxMessage = namedtuple('OutboxMessage', 'id reminder_id user_id kind text attempts')
+
+
+class DeliveryRejected(Exception):
+    """Отправка невозможна в принципе (например, бот заблокирован) — повторять не нужно"""
+
+
+def cancel_reminder(conn, reminder_id):
+    """Снимает неотправленные строки удаляемого напоминания внутри транзакции conn.
+
+    Строки in_flight тоже удаляются: если отправитель упадёт, аренда истечёт
+    и строку никто не заберёт повторно; complete() живого отправителя просто
+    не найдёт её. Вызывать при удалении напоминания пользователем — не при
+    удалении одноразового напоминания после срабатывания, его отправка уже в очереди.
+    """
+    return conn.execute("DELETE FROM reminder_outbox WHERE reminder_id = ? AND status IN ('pending', 'in_flight')",
+                        (reminder_id,)).rowcount
+
+
+class ReminderOutbox:
+    """Очередь отправок напоминаний в базе.
+
+    Срабатывание напоминания записывается в reminder_outbox той же транзакцией,
+    что сдвигает его расписание, поэтому напоминание не теряется и не
+    дублируется при падении между отправкой и обновлением базы. Отправители
+    забирают строки атомарно (pending → in_flight) под своим именем; строки
+    in_flight, аренда которых истекла (процесс упал посреди отправки),
+    возвращаются в работу. Несколько процессов бота могут работать с одной
+    базой: каждую строку забирает только один из них, а с leases (ShardLeases)
+    процесс берёт только строки своих частей пользователей.
+    """
+
+    def __init__(self, db, send, delivery, batch_size=100, lease_seconds=120, max_attempts=3,
+                 retry_seconds=60, poll_seconds=30, owner=None, leases=None):
+        self.db = db
+        self.send = send
+        self.delivery = delivery
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_seconds = retry_seconds
+        self.poll_seconds = poll_seconds
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}"
+        self.leases = leases
+        self._wakeup = threading.Event()
+
+    def enqueue_many(self, conn, messages):
+        """Добавляет отправки [(reminder_id, user_id, due_at, kind, text)] внутри транзакции conn.
+
+        Строка добавляется, только если у напоминания всё ещё next_send_at = due_at,
+        поэтому вызывать нужно до сдвига расписания; повтор того же срабатывания игнорируется.
+        """
+        now = int(time.time())
+        conn.executemany(
+            """INSERT OR IGNORE INTO reminder_outbox (reminder_id, user_id, due_at, kind, text, status, available_at, created_at)
+               SELECT ?, ?, ?, ?, ?, 'pending', ?, ?
+               WHERE EXISTS (SELECT 1 FROM reminders WHERE id = ? AND next_send_at = ?)""",
+            [(reminder_id, user_id, due_at, kind, text, now, now, reminder_id, due_at)
+             for reminder_id, user_id, due_at, kind, text in messages])
+
+    def claim(self, limit=None, now=None):
+        """Забирает до limit готовых к отправке строк и помечает их in_flight"""
+        now = int(now or time.time())
+        shard_sql, shard_params = self.leases.sql_filter() if self.leases else ("1 = 1", [])
+        with self.db.transaction() as conn:
+            rows = conn.execute(
+                f"""SELECT id, reminder_id, user_id, kind, text, attempts FROM reminder_outbox
+                    WHERE ((status = 'pending' AND available_at <= ?) OR (status = 'in_flight' AND claimed_at < ?))
+                      AND {shard_sql}
+                    ORDER BY due_at LIMIT ?""",
+                (now, now - self.lease_seconds, *shard_params, limit or self.batch_size)).fetchall()
+            # Условие повторяется в UPDATE: строку, которую успел забрать другой процесс, пропускаем
+            claimed = [row for row in rows if conn.execute(
+                """UPDATE reminder_outbox SET status = 'in_flight', claimed_by = ?, claimed_at = ?, attempts = attempts + 1
+                   WHERE id = ? AND ((status = 'pending' AND available_at <= ?) OR (status = 'in_flight' AND claimed_at < ?))""",
+                (self.owner, now, row[0], now, now - self.lease_seconds)).rowcount]
+        return [OutboxMessage(*row[:5], row[5] + 1) for row in claimed]
+
+    def complete(self, results):
+        """Сохраняет итоги отправки [(message, error)]; error None — отправлено"""
+        now = int(time.time())
+        sent, retry, failed = [], [], []
+        for message, error in results:
+            if error is None:
+                sent.append((now, message.id, self.owner))
+            elif isinstance(error, DeliveryRejected) or message.attempts >= self.max_attempts:
+                failed.append((str(error)[:200], message.id, self.owner))
+            else:
+                retry.append((now + self.retry_seconds * message.attempts, str(error)[:200], message.id, self.owner))
+
+        # claimed_by в условии: если аренда истекла и строку забрал другой процесс, её не трогаем
+        with self.db.transaction() as conn:
+            conn.executemany("UPDATE reminder_outbox SET status = 'sent', sent_at = ?, error = NULL WHERE id = ? AND claimed_by = ?", sent)
+            conn.executemany("UPDATE reminder_outbox SET status = 'pending', available_at = ?, error = ? WHERE id = ? AND claimed_by = ?", retry)
+            conn.executemany("UPDATE reminder_outbox SET status = 'failed', error = ? WHERE id = ? AND claimed_by = ?", failed)
+        return len(sent), len(retry), len(failed)
+
+    def stats(self):
+        rows = self.db.execute("SELECT status, COUNT(*) FROM reminder_outbox GROUP BY status", fetchall=True) or []
+        counts = {'pending': 0, 'in_flight': 0, 'sent': 0, 'failed': 0}
+        counts.update(dict(rows))
+        return counts
+
+    def purge(self, keep_days=7):
+        """Удаляет отправленные и неудачные строки старше keep_days"""
+        cutoff = int(time.time()) - keep_days * 86400
+        return self.db.execute("DELETE FROM reminder_outbox WHERE status IN ('sent', 'failed') AND created_at < ?",
+                               (cutoff,), commit=True)
+
+    def wake(self):
+        self._wakeup.set()
+
+    def start(self):
+        thread = threading.Thread(target=self._run, daemon=True, name='outbox')
+        thread.start()
+        return thread
+
+    def _deliver(self, message, results):
+        try:
+            self.send(message)
+            results.append((message, None))
+            return True
+        except Exception as e:
+            results.append((message, e))
+            return False
+
+    def deliver_pending(self):
+        """Отправляет всё, что готово к отправке; возвращает (отправлено, отложено, не удалось)"""
+        totals = [0, 0, 0]
+        while True:
+            messages = self.claim()
+            if not messages:
+                return tuple(totals)
+            results = []
+            stats = self.delivery.run_batch([(message.user_id, lambda message=message: self._deliver(message, results))
+                                             for message in messages])
+            print(f"📬 Доставлено напоминаний: {stats['total'] - stats['failed']}/{stats['total']} "
+                  f"за {stats['duration']} с (p50 {stats['p50']} с, p95 {stats['p95']} с, max {stats['max']} с)")
+            for i, count in enumerate(self.complete(results)):
+                totals[i] += count
+
+    def _run(self):
+        last_purge = None
+        while True:
+            self._wakeup.wait(self.poll_seconds)
+            self._wakeup.clear()
+            try:
+                sent, retry, failed = self.deliver_pending()
+                if sent or retry or failed:
+                    print(f"📬 Очередь напоминаний: отправлено {sent}, отложено {retry}, не удалось {failed}")
+                if last_purge is None or time.monotonic() - last_purge >= 86400:
+                    self.purge()
+                    last_purge = time.monotonic()
+            except Exception as e:
+                print(f"❌ Ошибка очереди напоминаний: {e}")
+                time.sleep(5)
@@ -0,0 +1,171 @@
+import calendar
+import datetime
+from collections import namedtuple
+from datetime import timedelta
+
+from timezones import local_now, to_epoch
+
+ONCE = 'once'
+DAILY = 'daily'
+WEEKLY = 'weekly'
+MONTHLY = 'monthly'
+
+ALL_DAYS = 0b1111111
+
+# Правило повтора в структурированном виде:
+#   freq     — once / daily / weekly / monthly
+#   interval — шаг в днях, неделях или месяцах
+#   weekdays — битовая маска дней недели для weekly (бит 0 — понедельник)
+#   anchor   — дата первого срабатывания, от неё отсчитываются интервалы
+RecurrenceRule = namedtuple('RecurrenceRule', 'freq interval weekdays anchor')
+
+# Варианты повтора из интерфейса бота и Mini App. Маска None — день недели берётся из anchor
+REPEAT_RULES = {
+    'ежедневно': (DAILY, 1, ALL_DAYS),
+    'раз в 2 дня': (DAILY, 2, ALL_DAYS),
+    'раз в неделю': (WEEKLY, 1, None),
+    'раз в 2 недели': (WEEKLY, 2, None),
+    'раз в месяц': (MONTHLY, 1, ALL_DAYS),
+    'по рабочим дням (Пн-Пт)': (WEEKLY, 1, 0b0011111),
+    'по выходным': (WEEKLY, 1, 0b1100000),
+    'каждую среду и пятницу': (WEEKLY, 1, 0b0010100),
+    '1 раз': (ONCE, 1, ALL_DAYS),
+}
+DEFAULT_REPEAT_RULE = (DAILY, 1, ALL_DAYS)
+
+
+def _first_day_from(mask, weekday):
+    # Через сколько дней от weekday (включительно) до конца недели будет день из маски
+    for ahead in range(7 - weekday):
+        if mask & (1 << (weekday + ahead)):
+            return ahead
+    return None
+
+
+# Таблица на все 128 масок: поиск следующего дня недели без циклов во время работы
+FIRST_DAY_FROM = [[_first_day_from(mask, weekday) for weekday in range(7)] for mask in range(128)]
+
+
+def compile_rule(repeat, anchor):
+    freq, interval, weekdays = REPEAT_RULES.get(repeat, DEFAULT_REPEAT_RULE)
+    if weekdays is None:
+        weekdays = 1 << anchor.weekday()
+    return RecurrenceRule(freq, interval, weekdays, anchor)
+
+
+def rule_from_row(repeat, freq, interval, weekdays, anchor, fallback_anchor=None):
+    """Правило из столбцов rrule_*; для строк без них — из текстового repeat"""
+    if freq:
+        return RecurrenceRule(freq, interval or 1, weekdays or ALL_DAYS, datetime.date.fromisoformat(anchor))
+    return compile_rule(repeat, fallback_anchor or datetime.date.today())
+
+
+def rule_columns(rule):
+    return rule.freq, rule.interval, rule.weekdays, rule.anchor.isoformat()
+
+
+def occurs_on(rule, date):
+    if date < rule.anchor:
+        return False
+    if rule.freq == ONCE:
+        return date == rule.anchor
+    if rule.freq == DAILY:
+        return (date - rule.anchor).days % rule.interval == 0
+    if rule.freq == WEEKLY:
+        anchor_monday = rule.anchor - timedelta(days=rule.anchor.weekday())
+        week = (date - anchor_monday).days // 7
+        return week % rule.interval == 0 and bool(rule.weekdays & (1 << date.weekday()))
+    return date == _monthly_date(rule, _month_index(date))
+
+
+def _month_index(date):
+    return date.year * 12 + date.month - 1
+
+
+def _monthly_date(rule, month_index):
+    # День месяца берётся из anchor; в коротких месяцах — последний день
+    year, month = divmod(month_index, 12)
+    month += 1
+    return datetime.date(year, month, min(rule.anchor.day, calendar.monthrange(year, month)[1]))
+
+
+def first_date_on_or_after(rule, start):
+    """Первая дата срабатывания не раньше start или None для разового правила"""
+    if start < rule.anchor:
+        start = rule.anchor
+
+    if rule.freq == ONCE:
+        return rule.anchor if start == rule.anchor else None
+
+    if rule.freq == DAILY:
+        return start + timedelta(days=-(start - rule.anchor).days % rule.interval)
+
+    if rule.freq == WEEKLY:
+        anchor_monday = rule.anchor - timedelta(days=rule.anchor.weekday())
+        week = (start - anchor_monday).days // 7
+        if week % rule.interval == 0:
+            ahead = FIRST_DAY_FROM[rule.weekdays][start.weekday()]
+            if ahead is not None:
+                return start + timedelta(days=ahead)
+            week += 1
+        week += -week % rule.interval
+        return anchor_monday + timedelta(weeks=week, days=FIRST_DAY_FROM[rule.weekdays][0])
+
+    anchor_index = _month_index(rule.anchor)
+    index = _month_index(start)
+    index += -(index - anchor_index) % rule.interval
+    date = _monthly_date(rule, index)
+    if date < start:
+        date = _monthly_date(rule, index + rule.interval)
+    return date
+
+
+def next_send_after(rule, time_str, after):
+    """Ближайшее срабатывание строго после after в заданное время HH:MM"""
+    send_time = datetime.datetime.strptime(time_str, '%H:%M').time()
+    date = first_date_on_or_after(rule, after.date())
+    if date is not None and datetime.datetime.combine(date, send_time) <= after:
+        date = first_date_on_or_after(rule, after.date() + timedelta(days=1))
+    if date is None:
+        return None
+    return datetime.datetime.combine(date, send_time)
+
+
+def schedule_new(repeat, time_str, now):
+    """Правило и первое срабатывание для нового напоминания: сегодня, если время ещё не прошло, иначе позже"""
+    send_time = datetime.datetime.strptime(time_str, '%H:%M').time()
+    anchor = now.date()
+    if datetime.datetime.combine(anchor, send_time) < now:
+        anchor += timedelta(days=1)
+    rule = compile_rule(repeat, anchor)
+    return rule, next_send_after(rule, time_str, now)
+
+
+def next_send_epoch(rule, time_str, tz, now=None):
+    """next_send_after в поясе пользователя tz; результат — UTC epoch или None"""
+    next_send = next_send_after(rule, time_str, local_now(tz, now))
+    return to_epoch(next_send, tz) if next_send else None
+
+
+def schedule_new_epoch(repeat, time_str, tz, now=None):
+    """schedule_new в поясе пользователя tz: правило и первое срабатывание как UTC epoch"""
+    rule, next_send = schedule_new(repeat, time_str, local_now(tz, now))
+    return rule, to_epoch(next_send, tz)
+
+
+def next_occurrences(reminders, after, count=1):
+    """Следующие count срабатываний для многих напоминаний сразу.
+
+    reminders — итерируемое из (reminder_id, rule, time_str); возвращает {reminder_id: [datetime, ...]}
+    """
+    result = {}
+    for reminder_id, rule, time_str in reminders:
+        occurrences = []
+        moment = after
+        while len(occurrences) < count:
+            moment = next_send_after(rule, time_str, moment)
+            if moment is None:
+                break
+            occurrences.append(moment)
+        result[reminder_id] = occurrences
+    return result
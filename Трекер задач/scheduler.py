@@ -0,0 +1,114 @@
+import heapq
+import threading
+import time
+
+
+class ReminderScheduler:
+    """Расписание напоминаний в памяти: min-heap по next_send_at (UTC epoch).
+
+    Поток доставки спит ровно до ближайшего напоминания и просыпается раньше,
+    если расписание изменилось. Раз в resync_seconds куча перестраивается из
+    базы, чтобы подхватить напоминания, созданные другим процессом (веб-API).
+    load_schedule(until) возвращает (id, next_send_at) с next_send_at < until:
+    в куче держатся только напоминания до следующей пересборки.
+    load_version() — дешёвая версия напоминаний в базе; если она задана, раз в
+    check_seconds версия сверяется и куча перестраивается, только когда она
+    изменилась, так что изменения других процессов видны через секунды.
+    """
+
+    def __init__(self, load_schedule, resync_seconds=60, load_version=None, check_seconds=5):
+        self.load_schedule = load_schedule
+        self.resync_seconds = resync_seconds
+        self.load_version = load_version
+        self.check_seconds = check_seconds
+
+        self._heap = []
+        self._due_at = {}
+        self._cond = threading.Condition()
+        self._last_sync = None
+        self._version = None
+        self._last_check = None
+
+    def rebuild(self):
+        # Версия читается до расписания: изменение между ними вызовет ещё одну пересборку, а не потеряется
+        version = self.load_version() if self.load_version else None
+        # Запас в один период: пересборка может немного опоздать
+        rows = self.load_schedule(int(time.time()) + 2 * self.resync_seconds)
+        due_at = dict(rows)
+
+        with self._cond:
+            self._due_at = due_at
+            self._heap = [(next_send_at, reminder_id) for reminder_id, next_send_at in due_at.items()]
+            heapq.heapify(self._heap)
+            self._last_sync = self._last_check = time.monotonic()
+            self._version = version
+            self._cond.notify_all()
+
+    def schedule(self, reminder_id, next_send_at):
+        with self._cond:
+            if next_send_at is None:
+                self._due_at.pop(reminder_id, None)
+                return
+            self._due_at[reminder_id] = next_send_at
+            heapq.heappush(self._heap, (next_send_at, reminder_id))
+            if self._heap[0] == (next_send_at, reminder_id):
+                self._cond.notify_all()
+
+    def unschedule(self, reminder_id):
+        self.schedule(reminder_id, None)
+
+    def __len__(self):
+        with self._cond:
+            return len(self._due_at)
+
+    def _peek(self):
+        # Записи, у которых время устарело (перенос/удаление), выбрасываются лениво
+        while self._heap:
+            next_send_at, reminder_id = self._heap[0]
+            if self._due_at.get(reminder_id) == next_send_at:
+                return next_send_at
+            heapq.heappop(self._heap)
+        return None
+
+    def _resync_left(self):
+        if self._last_sync is None:
+            return 0
+        return self.resync_seconds - (time.monotonic() - self._last_sync)
+
+    def _check_left(self):
+        if self.load_version is None:
+            return self._resync_left()
+        if self._last_check is None:
+            return 0
+        return self.check_seconds - (time.monotonic() - self._last_check)
+
+    def _changed_elsewhere(self):
+        version = self.load_version()
+        self._last_check = time.monotonic()
+        return version != self._version
+
+    def wait_due(self):
+        """Блокирует поток до ближайшего напоминания и возвращает id всех наступивших"""
+        while True:
+            if self._resync_left() <= 0:
+                self.rebuild()
+            elif self._check_left() <= 0 and self._changed_elsewhere():
+                self.rebuild()
+
+            with self._cond:
+                now = time.time()
+                head = self._peek()
+                if head is not None and head <= now:
+                    due = []
+                    while head is not None and head <= now:
+                        _, reminder_id = heapq.heappop(self._heap)
+                        del self._due_at[reminder_id]
+                        due.append(reminder_id)
+                        head = self._peek()
+                    return due
+
+                timeout = min(self._resync_left(), self._check_left())
+                if head is not None:
+                    timeout = min(timeout, head - now)
+                if timeout > 0:
+                    self._cond.wait(timeout)
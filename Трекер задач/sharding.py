@@ -0,0 +1,114 @@
+import math
+import os
+import socket
+import threading
+import time
+
+
+class ShardLeases:
+    """Распределение пользователей между процессами планировщика.
+
+    Пользователи делятся на shards частей по user_id % shards. Каждый процесс
+    раз в heartbeat_seconds отмечается в scheduler_workers, продлевает аренду
+    своих частей и забирает свободные или просроченные, пока у него не станет
+    поровну с другими живыми процессами; лишние части отдаёт. Если процесс
+    умер, его аренды истекают через lease_seconds и части разбирают остальные.
+    Время аренды — UTC epoch, поэтому часы хостов должны быть синхронизированы.
+    """
+
+    def __init__(self, db, shards=16, lease_seconds=30, heartbeat_seconds=10, on_change=None, owner=None):
+        self.db = db
+        self.shards = shards
+        self.lease_seconds = lease_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        self.on_change = on_change
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}"
+        self.owned = frozenset()
+        self._lease_until = 0
+        self._lock = threading.Lock()
+
+    def heartbeat(self, now=None):
+        """Продлевает и перераспределяет аренды; возвращает множество своих частей"""
+        now = int(now or time.time())
+        lease_until = now + self.lease_seconds
+
+        # Каждый захват — условный UPDATE с проверкой rowcount: два процесса не получат одну часть
+        # ни в SQLite, ни в PostgreSQL, где транзакции идут параллельно
+        with self.db.transaction() as conn:
+            conn.execute("""INSERT INTO scheduler_workers (owner, heartbeat_at) VALUES (?, ?)
+                            ON CONFLICT (owner) DO UPDATE SET heartbeat_at = excluded.heartbeat_at""", (self.owner, now))
+            conn.execute("DELETE FROM scheduler_workers WHERE heartbeat_at < ?", (now - self.lease_seconds,))
+            workers = conn.execute("SELECT COUNT(*) FROM scheduler_workers").fetchone()[0]
+            target = math.ceil(self.shards / max(workers, 1))
+
+            conn.executemany("INSERT OR IGNORE INTO scheduler_shards (shard, owner, lease_until) VALUES (?, NULL, 0)",
+                             [(shard,) for shard in range(self.shards)])
+            mine = [row[0] for row in conn.execute(
+                "SELECT shard FROM scheduler_shards WHERE owner = ? AND lease_until >= ? AND shard < ? ORDER BY shard",
+                (self.owner, now, self.shards))]
+
+            # Лишнее отдаём, чтобы новый процесс получил свою долю на следующем пульсе
+            released = mine[target:]
+            mine = mine[:target]
+            conn.executemany("UPDATE scheduler_shards SET owner = NULL, lease_until = 0 WHERE shard = ? AND owner = ?",
+                             [(shard, self.owner) for shard in released])
+
+            mine = [shard for shard in mine if conn.execute(
+                "UPDATE scheduler_shards SET lease_until = ? WHERE shard = ? AND owner = ?",
+                (lease_until, shard, self.owner)).rowcount]
+
+            if len(mine) < target:
+                free = [row[0] for row in conn.execute(
+                    "SELECT shard FROM scheduler_shards WHERE (owner IS NULL OR lease_until < ?) AND shard < ? ORDER BY shard",
+                    (now, self.shards)).fetchall()]
+                for shard in free:
+                    if len(mine) >= target:
+                        break
+                    if conn.execute("""UPDATE scheduler_shards SET owner = ?, lease_until = ?
+                                       WHERE shard = ? AND (owner IS NULL OR lease_until < ?)""",
+                                    (self.owner, lease_until, shard, now)).rowcount:
+                        mine.append(shard)
+
+        owned = frozenset(mine)
+        with self._lock:
+            changed = owned != self.owned
+            self.owned = owned
+            self._lease_until = lease_until
+        if changed and self.on_change:
+            self.on_change(owned)
+        return owned
+
+    def current(self):
+        """Свои части с действующей арендой; если продлить аренду не удалось, — пусто"""
+        with self._lock:
+            return self.owned if time.time() < self._lease_until else frozenset()
+
+    def sql_filter(self, column='user_id'):
+        """Условие SQL и параметры для отбора строк своих частей"""
+        owned = sorted(self.current())
+        if len(owned) == self.shards:
+            return "1 = 1", []
+        if not owned:
+            return "0 = 1", []
+        return f"{column} % {self.shards} IN ({', '.join('?' * len(owned))})", owned
+
+    def release(self):
+        with self.db.transaction() as conn:
+            conn.execute("UPDATE scheduler_shards SET owner = NULL, lease_until = 0 WHERE owner = ?", (self.owner,))
+            conn.execute("DELETE FROM scheduler_workers WHERE owner = ?", (self.owner,))
+        with self._lock:
+            self.owned = frozenset()
+            self._lease_until = 0
+
+    def start(self):
+        thread = threading.Thread(target=self._run, daemon=True, name='shard-leases')
+        thread.start()
+        return thread
+
+    def _run(self):
+        while True:
+            time.sleep(self.heartbeat_seconds)
+            try:
+                self.heartbeat()
+            except Exception as e:
+                print(f"❌ Ошибка продления аренды частей планировщика: {e}")
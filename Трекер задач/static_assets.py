@@ -0,0 +1,116 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Файлы с хешем в имени не меняются никогда — браузер берёт их из кэша без запроса
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+# Точка входа (и файлы, запрошенные по исходному имени) каждый раз сверяется по ETag
+REVALIDATE_CACHE_CONTROL = 'no-cache'
+
+
+class Asset:
+    __slots__ = ('mimetype', 'etag', 'cache_control', 'variants')
+
+    def __init__(self, mimetype, etag, cache_control, variants):
+        self.mimetype = mimetype
+        self.etag = etag
+        self.cache_control = cache_control
+        # Content-Encoding ('br', 'gzip', 'identity') → тело, от меньшего к большему
+        self.variants = variants
+
+
+class StaticAssets:
+    """Файлы Mini App, загруженные в память при старте.
+
+    Каждый файл, кроме точки входа, доступен и под именем с хешем содержимого
+    (app.3f2a9c1d7b4e.js) — такие ответы кэшируются на год. Ссылки на файлы
+    в точке входа переписываются на эти имена, так что после изменения файла
+    клиент загрузит новую версию, а неизменные останутся в кэше. Сжатые gzip и
+    brotli (если установлен пакет Brotli) варианты готовятся один раз.
+    auto_reload — перечитывать каталог при изменении файлов (для сервера разработки).
+    """
+
+    def __init__(self, directory, url_prefix='/webapp/', entry='index.html', min_compress_size=512):
+        self.directory = directory
+        self.url_prefix = url_prefix
+        self.entry = entry
+        self.min_compress_size = min_compress_size
+        self.auto_reload = False
+        self._assets = {}
+        self._mtimes = {}
+        self.load()
+
+    def _scan(self):
+        mtimes = {}
+        for root, _, files in os.walk(self.directory):
+            for filename in files:
+                path = os.path.join(root, filename)
+                mtimes[os.path.relpath(path, self.directory).replace(os.sep, '/')] = os.path.getmtime(path)
+        return mtimes
+
+    def _compress(self, body):
+        variants = []
+        if len(body) >= self.min_compress_size:
+            if brotli is not None:
+                variants.append(('br', brotli.compress(body, quality=11)))
+            variants.append(('gzip', gzip.compress(body, compresslevel=9, mtime=0)))
+        variants = [(encoding, data) for encoding, data in variants if len(data) < len(body)]
+        variants.sort(key=lambda variant: len(variant[1]))
+        return dict(variants + [('identity', body)])
+
+    def _asset(self, name, body, cache_control):
+        digest = hashlib.sha256(body).hexdigest()
+        mimetype = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        return Asset(mimetype, digest[:32], cache_control, self._compress(body)), digest[:12]
+
+    def load(self):
+        mtimes = self._scan()
+        assets = {}
+        hashed_names = {}
+        for name in mtimes:
+            if name == self.entry:
+                continue
+            with open(os.path.join(self.directory, name), 'rb') as f:
+                body = f.read()
+            assets[name], digest = self._asset(name, body, REVALIDATE_CACHE_CONTROL)
+            stem, ext = os.path.splitext(name)
+            hashed = f"{stem}.{digest}{ext}"
+            assets[hashed] = Asset(assets[name].mimetype, assets[name].etag, IMMUTABLE_CACHE_CONTROL, assets[name].variants)
+            hashed_names[name] = hashed
+
+        if self.entry in mtimes:
+            with open(os.path.join(self.directory, self.entry), encoding='utf-8') as f:
+                html = f.read()
+            for name, hashed in hashed_names.items():
+                html = html.replace(f'"{self.url_prefix}{name}"', f'"{self.url_prefix}{hashed}"')
+            assets[self.entry], _ = self._asset(self.entry, html.encode('utf-8'), REVALIDATE_CACHE_CONTROL)
+
+        self._assets = assets
+        self._mtimes = mtimes
+
+    def get(self, name):
+        if self.auto_reload and self._scan() != self._mtimes:
+            self.load()
+        return self._assets.get(name)
+
+    def response(self, app, request, name):
+        """Ответ Flask с подходящим Accept-Encoding вариантом, ETag и Cache-Control; 304 при совпадении If-None-Match"""
+        asset = self.get(name)
+        if asset is None:
+            return None
+        encoding, body = next(((encoding, body) for encoding, body in asset.variants.items()
+                               if encoding == 'identity' or request.accept_encodings[encoding]))
+        response = app.response_class(body, mimetype=asset.mimetype)
+        if encoding != 'identity':
+            response.headers['Content-Encoding'] = encoding
+        response.headers['Vary'] = 'Accept-Encoding'
+        response.headers['Cache-Control'] = asset.cache_control
+        # У каждого варианта сжатия свой ETag: это разные байты
+        response.set_etag(f"{asset.etag}-{encoding}")
+        return response.make_conditional(request)
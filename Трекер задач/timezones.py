@@ -0,0 +1,105 @@
+import datetime
+import functools
+import os
+import re
+import time
+
+import pytz
+
+_OFFSET_RE = re.compile(r'^(?:UTC|GMT)?\s*([+-])(\d{1,2})(?::?(\d{2}))?$', re.IGNORECASE)
+
+
+def server_timezone():
+    """Пояс сервера по TZ, /etc/timezone или ссылке /etc/localtime; иначе смещение из time.timezone.
+
+    Миграция 7 перевела next_send в UTC как местное время сервера, поэтому
+    пользователи без своего пояса должны остаться в поясе сервера.
+    """
+    names = []
+    if 'TZ' in os.environ:
+        # Заданный TZ, даже не в виде имени IANA, важнее системных файлов
+        names.append(os.environ['TZ'].lstrip(':'))
+    else:
+        try:
+            with open('/etc/timezone') as f:
+                names.append(f.read().strip())
+        except OSError:
+            pass
+        path = os.path.realpath('/etc/localtime')
+        if '/zoneinfo/' in path:
+            zone = path.split('/zoneinfo/', 1)[1]
+            names.append(zone.split('/', 1)[1] if zone.startswith(('posix/', 'right/')) else zone)
+    for name in names:
+        if name in pytz.all_timezones_set:
+            return name
+    minutes = -time.timezone // 60
+    if not minutes:
+        return 'UTC'
+    return f"UTC{'+' if minutes > 0 else '-'}{abs(minutes) // 60:02d}:{abs(minutes) % 60:02d}"
+
+
+# Пояс пользователей, которые его не указывали
+DEFAULT_TIMEZONE = server_timezone()
+
+
+def normalize_timezone(text):
+    """Имя IANA (Europe/Berlin) или смещение (+3, UTC+05:30) в каноническом виде; None, если не распознано"""
+    text = (text or '').strip()
+    match = _OFFSET_RE.match(text)
+    if match:
+        sign, hours, minutes = match.group(1), int(match.group(2)), int(match.group(3) or 0)
+        if hours > 14 or minutes >= 60:
+            return None
+        return f"UTC{sign}{hours:02d}:{minutes:02d}"
+    if text.upper() in ('UTC', 'GMT'):
+        return 'UTC'
+    for name in pytz.all_timezones:
+        if name.lower() == text.lower():
+            return name
+    return None
+
+
+@functools.lru_cache(maxsize=None)
+def get_timezone(name):
+    """pytz-пояс по имени из normalize_timezone; пустое или неизвестное имя — пояс по умолчанию"""
+    name = name or DEFAULT_TIMEZONE
+    match = _OFFSET_RE.match(name)
+    if match:
+        minutes = int(match.group(2)) * 60 + int(match.group(3) or 0)
+        return pytz.FixedOffset(minutes if match.group(1) == '+' else -minutes)
+    try:
+        return pytz.timezone(name)
+    except pytz.UnknownTimeZoneError:
+        return get_timezone(DEFAULT_TIMEZONE)
+
+
+def local_now(tz, now=None):
+    """Текущее время пользователя без tzinfo; now — UTC epoch"""
+    return from_epoch(time.time() if now is None else now, tz)
+
+
+def from_epoch(epoch, tz):
+    return datetime.datetime.fromtimestamp(epoch, tz).replace(tzinfo=None)
+
+
+def to_epoch(local_dt, tz):
+    """Местное время пользователя в UTC epoch; при переходе на летнее время несуществующий час сдвигается вперёд"""
+    return int(tz.normalize(tz.localize(local_dt, is_dst=False)).timestamp())
+
+
+def set_user_timezone(db, user_id, name):
+    """Меняет пояс пользователя, сохраняя местное время уже запланированных напоминаний.
+
+    Возвращает [(reminder_id, next_send_at)] для обновления расписания.
+    """
+    with db.transaction() as conn:
+        row = conn.execute("SELECT timezone FROM users WHERE user_id = ?", (user_id,)).fetchone()
+        old_tz, new_tz = get_timezone(row[0] if row else None), get_timezone(name)
+        conn.execute("UPDATE users SET timezone = ? WHERE user_id = ?", (name, user_id))
+
+        rescheduled = [(reminder_id, to_epoch(from_epoch(next_send_at, old_tz), new_tz))
+                       for reminder_id, next_send_at in conn.execute(
+                           "SELECT id, next_send_at FROM reminders WHERE user_id = ? AND next_send_at IS NOT NULL", (user_id,))]
+        conn.executemany("UPDATE reminders SET next_send_at = ? WHERE id = ?",
+                         [(next_send_at, reminder_id) for reminder_id, next_send_at in rescheduled])
+    return rescheduled
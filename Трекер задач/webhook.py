@@ -0,0 +1,26 @@
+import telebot
+from flask import Flask, request, abort
+
+
+def create_webhook_app(dispatcher, secret_token, path='/telegram/webhook'):
+    """Flask-приложение, принимающее апдейты Telegram и передающее их в dispatcher"""
+    app = Flask(__name__)
+
+    @app.route(path, methods=['POST'])
+    def telegram_webhook():
+        if secret_token and request.headers.get('X-Telegram-Bot-Api-Secret-Token') != secret_token:
+            abort(403)
+
+        update = telebot.types.Update.de_json(request.get_data(as_text=True))
+        if update is None:
+            abort(400)
+
+        # Отвечаем Telegram сразу, обработка идёт в потоках диспетчера
+        dispatcher.submit(update)
+        return ''
+
+    @app.route('/health', methods=['GET'])
+    def webhook_health():
+        return {"status": "healthy", "pending": dispatcher.pending(), "processed": dispatcher.processed}
+
+    return app